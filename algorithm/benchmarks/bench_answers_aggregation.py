@@ -0,0 +1,92 @@
+"""
+Compares the QA answers aggregation with the original aggregation that checks every answer against every kept answer.
+Both run on the same synthetic answers, where many answers are substrings of others and many scores are tied,
+the aggregated answers must be identical, in the same order.
+
+Run from the algorithm directory: python -m benchmarks.bench_answers_aggregation
+"""
+import random
+import string
+import time
+import numpy as np
+
+from thesis_diseases_risk_factors.domain.question_answering._answers_aggregator import _AnswersAggregator
+
+
+def _legacy_aggregate_answers(articles_answers):
+    predicted_answers = {}
+    for example_id, answers in articles_answers:
+        for text, score in answers:
+            if text in predicted_answers:
+                if score > predicted_answers[text]['score']:
+                    predicted_answers[text]['score'] = score
+                predicted_answers[text]['article_ids'].add(example_id)
+            else:
+                predicted_answers[text] = {'score': score, 'article_ids': set([example_id])}
+
+    if predicted_answers:
+        max_value = max(val['score'] for val in predicted_answers.values())
+        threshold = max_value * 0.6
+        filtered_predicted_answers = {key: val for key, val in predicted_answers.items() if val['score'] >= threshold}
+        sorted_filtered_predicted_answers = {k: v for k, v in sorted(filtered_predicted_answers.items(), key=lambda item: item[1]['score'], reverse=True)}
+        final_filtered_answers = {}
+
+        for key, value in sorted_filtered_predicted_answers.items():
+            should_add = True
+            for existing_key, existing_value in final_filtered_answers.items():
+                if existing_key.find(key) != -1 and existing_value['score'] > value['score']:
+                    should_add = False
+                    break
+                elif key.find(existing_key) != -1 and value['score'] > existing_value['score']:
+                    del final_filtered_answers[existing_key]
+                    break
+            if should_add:
+                final_filtered_answers[key] = value
+
+        return final_filtered_answers
+    else:
+        return predicted_answers
+
+
+def _synthetic_articles_answers(rng, articles_count, alphabet, score_levels):
+    # Answers are spans of a few long phrases, so they often contain each other, the scores are float32 logits with ties
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))) for _ in range(200)]
+    phrases = [[rng.choice(words) for _ in range(rng.randint(3, 12))] for _ in range(max(articles_count // 10, 1))]
+    articles_answers = []
+    for article_id in range(articles_count):
+        answers = []
+        for _ in range(10):
+            phrase = rng.choice(phrases)
+            start = rng.randint(0, len(phrase) - 1)
+            text = " ".join(phrase[start:rng.randint(start + 1, len(phrase))])
+            score = np.float32(rng.randint(score_levels // 2, score_levels) / score_levels * 20 + 1)
+            answers.append((text, score))
+        articles_answers.append((str(article_id), answers))
+    return articles_answers
+
+
+def main():
+    rng = random.Random(0)
+    aggregator = _AnswersAggregator(threshold_ratio=0.6)
+    cases = [(articles_count, alphabet, score_levels)
+             for articles_count in [10, 100, 1000, 5000]
+             for alphabet, score_levels in [("ab", 8), (string.ascii_lowercase, 1000)]]
+    for articles_count, alphabet, score_levels in cases:
+        articles_answers = _synthetic_articles_answers(rng, articles_count, alphabet, score_levels)
+
+        start = time.perf_counter()
+        legacy_answers = _legacy_aggregate_answers(articles_answers)
+        legacy_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        answers = aggregator.aggregate(articles_answers)
+        seconds = time.perf_counter() - start
+
+        assert list(legacy_answers.items()) == list(answers.items())
+        candidates_count = len(set(text for _, article_answers in articles_answers for text, _ in article_answers))
+        print(f"{articles_count} articles, alphabet of {len(alphabet)}, {score_levels} score levels: {candidates_count} candidates, {len(answers)} kept, identical outputs, "
+              f"legacy: {legacy_seconds:.3f}s, indexed: {seconds:.3f}s, speedup: {legacy_seconds / seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Compares the vectorized QA span scorer with the original n_best x n_best Python loop.
+Both run on the same synthetic features, the produced answers must be identical.
+
+Run from the algorithm directory: python -m benchmarks.bench_qa_span_scorer
+"""
+import random
+import string
+import time
+import numpy as np
+
+from thesis_diseases_risk_factors.domain.question_answering._span_scorer import _SpanScorer
+
+
+n_best = 20
+max_answer_length = 60
+
+
+def _legacy_score(start_logit, end_logit, offsets, context):
+    answers = []
+    start_indexes = np.argsort(start_logit, kind="stable")[-1 : -n_best - 1 : -1].tolist()
+    end_indexes = np.argsort(end_logit, kind="stable")[-1 : -n_best - 1 : -1].tolist()
+    for start_index in start_indexes:
+        for end_index in end_indexes:
+            if offsets[start_index] is None or offsets[end_index] is None:
+                continue
+            if end_index < start_index:
+                continue
+
+            text = context[offsets[start_index][0] : offsets[end_index][1]]
+            if len(text) > max_answer_length:
+                continue
+
+            answers.append({"text": text, "logit_score": start_logit[start_index] + end_logit[end_index]})
+    return answers
+
+
+def _synthetic_feature(rng, max_length=384, question_length=12):
+    context = "".join(rng.choice(string.ascii_lowercase + " ") for _ in range(2000))
+    offsets = [None] * (question_length + 2)
+    position = rng.randint(0, 100)
+    while len(offsets) < max_length - 1:
+        length = rng.randint(1, 8)
+        offsets.append([position, position + length])
+        position += length + rng.randint(0, 1)
+    offsets.append(None)
+
+    start_logit = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(size=max_length).astype(np.float32)
+    end_logit = np.random.default_rng(rng.randint(0, 2 ** 31)).normal(size=max_length).astype(np.float32)
+    # Make the short spans win often enough for the length filter to matter
+    end_logit[np.minimum(np.argsort(start_logit)[-5:] + 2, max_length - 1)] += 5
+    return start_logit, end_logit, offsets, context
+
+
+def main(features_count=2000):
+    rng = random.Random(0)
+    features = [_synthetic_feature(rng) for _ in range(features_count)]
+    span_scorer = _SpanScorer(n_best, max_answer_length)
+
+    start = time.perf_counter()
+    legacy_answers = [_legacy_score(*feature) for feature in features]
+    legacy_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized_answers = [span_scorer.score(start_logit, end_logit, offsets, context)
+                          for start_logit, end_logit, offsets, context in features]
+    vectorized_seconds = time.perf_counter() - start
+
+    for legacy, vectorized in zip(legacy_answers, vectorized_answers):
+        assert [(a["text"], float(a["logit_score"])) for a in legacy] == [(a["text"], float(a["logit_score"])) for a in vectorized]
+
+    answers_count = sum(len(answers) for answers in legacy_answers)
+    print(f"{features_count} features, {answers_count} answers, identical outputs")
+    print(f"legacy loop: {legacy_seconds:.3f}s, vectorized: {vectorized_seconds:.3f}s, speedup: {legacy_seconds / vectorized_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compares the QA windows throughput with and without trimming the windows padding.
+A small random BERT question answering model runs on the windows of synthetic articles asked the same question,
+the logits of the real tokens must be the same in both modes.
+
+Run from the algorithm directory: python -m benchmarks.bench_qa_windows
+"""
+import asyncio
+import os
+import random
+import string
+import tempfile
+import time
+import numpy as np
+import torch
+from transformers import BertConfig, BertForQuestionAnswering, BertTokenizerFast
+
+from thesis_diseases_risk_factors.domain.question_answering._qa_features_builder import _QAFeaturesBuilder
+from thesis_diseases_risk_factors.domain.question_answering._qa_window_batcher import _QAWindowBatcher
+
+
+max_length = 384
+stride = 128
+batch_size = 8
+
+
+class _TorchRunner:
+    def __init__(self, model) -> None:
+        self._model = model
+
+    async def run_async(self, inputs):
+        with torch.inference_mode():
+            outputs = self._model(**{name: torch.from_numpy(values) for name, values in inputs.items()})
+        return {"start_logits": outputs.start_logits.numpy(), "end_logits": outputs.end_logits.numpy()}
+
+
+def _tokenizer(rng, directory):
+    words = sorted(set("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 8))) for _ in range(3000)))
+    vocab_file = os.path.join(directory, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    return BertTokenizerFast(vocab_file=vocab_file), words
+
+
+def _features(rng, tokenizer, words, articles_count):
+    # Abstracts of 100 to 700 tokens, most articles end with a partially padded window
+    articles = [(str(i), " ".join(rng.choice(words) for _ in range(rng.randint(100, 700)))) for i in range(articles_count)]
+    contexts_encodings = []
+    for _, text in articles:
+        encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        contexts_encodings.append((np.array(encoding["input_ids"], dtype=np.int32), np.array(encoding["offset_mapping"], dtype=np.int32).reshape(-1, 2)))
+
+    question = "What are the risk factors of " + " ".join(rng.choice(words) for _ in range(4)) + "?"
+    features_batches = list(_QAFeaturesBuilder(tokenizer, max_length, stride).iter_batches(question, contexts_encodings, 256))
+    return {name: np.concatenate([features_batch.inputs[name] for features_batch in features_batches]) for name in ["input_ids", "token_type_ids", "attention_mask"]}
+
+
+def _run(model, inputs, trim_padding):
+    window_batcher = _QAWindowBatcher(batch_size, trim_padding)
+    start = time.perf_counter()
+    outputs = asyncio.run(window_batcher.run_async(_TorchRunner(model), inputs))
+    return outputs, time.perf_counter() - start, window_batcher
+
+
+def main(articles_count=200):
+    rng = random.Random(0)
+    torch.manual_seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        tokenizer, words = _tokenizer(rng, directory)
+
+    config = BertConfig(vocab_size=tokenizer.vocab_size, hidden_size=256, num_hidden_layers=4, num_attention_heads=4, intermediate_size=1024)
+    model = BertForQuestionAnswering(config).eval()
+    inputs = _features(rng, tokenizer, words, articles_count)
+
+    # Warm up the model before timing
+    _run(model, {name: values[:batch_size] for name, values in inputs.items()}, False)
+
+    full_outputs, full_seconds, full_batcher = _run(model, inputs, False)
+    trimmed_outputs, trimmed_seconds, trimmed_batcher = _run(model, inputs, True)
+
+    real_tokens = inputs["attention_mask"] == 1
+    for name in ["start_logits", "end_logits"]:
+        assert np.allclose(full_outputs[name][real_tokens], trimmed_outputs[name][real_tokens], atol=1e-4)
+
+    windows_count = len(inputs["input_ids"])
+    print(f"{articles_count} articles, {windows_count} windows, same real tokens logits")
+    print(f"full windows: {full_batcher.report()}")
+    print(f"trimmed windows: {trimmed_batcher.report()}")
+    print(f"full windows: {windows_count / full_seconds:.1f} windows/s, trimmed windows: {windows_count / trimmed_seconds:.1f} windows/s, "
+          f"speedup: {full_seconds / trimmed_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
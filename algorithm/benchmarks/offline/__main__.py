@@ -0,0 +1,65 @@
+"""
+Offline benchmark suite of the evaluation pipeline, it needs neither the GraphQL server nor the trained models.
+A fake GraphQL server, served to the generated client through an httpx mock transport, serves synthetic diseases, articles and QAs,
+and random weights BERT models with the BioBERT architecture stand in for the trained models.
+Each scenario runs in its own process and reports its throughput and peak RSS:
+fetch, classify, qa, post_process (answers aggregation) and end_to_end (ModelsService.evaluate_async).
+
+Run from the algorithm directory: python -m benchmarks.offline [scenarios] [--model-size tiny|small|base] [--runtime fp32|int8|onnx]
+"""
+import argparse
+import json
+import multiprocessing
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.offline.scenarios import SCENARIOS, prepare_work_path, run_scenario
+from benchmarks.offline.tiny_models import MODEL_SIZES
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.offline")
+    parser.add_argument("scenarios", nargs="*", help=f"any of {', '.join(SCENARIOS)}, all of them by default")
+    parser.add_argument("--model-size", choices=list(MODEL_SIZES), default="tiny")
+    parser.add_argument("--runtime", choices=["fp32", "int8", "onnx"], default="fp32")
+    parser.add_argument("--diseases", type=int, default=10)
+    parser.add_argument("--articles-per-disease", type=int, default=20)
+    parser.add_argument("--shared-articles-ratio", type=float, default=0.25)
+    parser.add_argument("--article-words", type=int, default=250)
+    parser.add_argument("--max-articles", type=int, default=0, help="limits the articles of the fetch, classify, qa and post_process scenarios, 0 for all")
+    parser.add_argument("--positive-ratio", type=float, default=0.5, help="ratio of the articles the random classification model classifies as positive")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="latency of every request to the fake server")
+    parser.add_argument("--inference-workers", type=int, default=0)
+    parser.add_argument("--post-process-repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="writes the results to a JSON file")
+    options = parser.parse_args()
+    unknown_scenarios = set(options.scenarios) - set(SCENARIOS)
+    if unknown_scenarios:
+        parser.error(f"unknown scenarios {', '.join(sorted(unknown_scenarios))}")
+    return options
+
+
+def main():
+    options = _parse_args()
+    scenarios = [name for name in SCENARIOS if not options.scenarios or name in options.scenarios]
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_path:
+        prepare_work_path(work_path, options)
+        for name in scenarios:
+            # A fresh process per scenario, so the loaded models, the caches and the peak RSS of a scenario don't leak to the next one
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_scenario, name, work_path, options).result()
+            results.append(result)
+            print(f"{name}: {result['items']} {result['unit']} in {result['seconds']:.3f}s, {result['throughput']:.1f} {result['unit']}/s, "
+                  f"peak RSS: {result['peakRssMB']:.0f} MB, baseline RSS: {result['baselineRssMB']:.0f} MB"
+                  + (f", inference workers peak RSS: {result['workersPeakRssMB']:.0f} MB" if options.inference_workers else ""))
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump({"options": vars(options), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+
+FAKE_GRAPH_URL = "http://fake-graph.local/query"
+
+
+class FakeGraphServer:
+    """
+    In process stand-in of the GraphQL server, served to the generated client through an httpx mock transport.
+    Serves synthetic diseases, articles, classification items and QAs, records the uploaded risk factors and counts the requests
+    """
+    def __init__(self,
+        words: List[str],
+        diseases_count: int,
+        articles_per_disease: int,
+        shared_articles_ratio: float,
+        article_words: int,
+        latency_seconds: float,
+        seed: int = 0) -> None:
+        self._latency_seconds = latency_seconds
+        rng = random.Random(seed)
+
+        self.diseases = [{"id": f"d{i}", "names": [" ".join(rng.choice(words) for _ in range(2))], "dbLinks": {"icd10": None, "icd11": None, "mesh": None},
+                          "category": "synthetic", "description": ""} for i in range(diseases_count)]
+
+        # A part of the articles of each disease is shared with the other diseases, like reviews that are returned for several searches
+        shared_count = int(articles_per_disease * shared_articles_ratio)
+        shared_ids = [f"s{i}" for i in range(max(shared_count * 2, 1))]
+        self.search_results = {}
+        for disease in self.diseases:
+            own_ids = [f"{disease['id']}-a{i}" for i in range(articles_per_disease - shared_count)]
+            self.search_results[disease["names"][0]] = own_ids + rng.sample(shared_ids, min(shared_count, len(shared_ids)))
+
+        articles_ids = sorted(set(id for ids in self.search_results.values() for id in ids))
+        self.articles = {id: " ".join(rng.choice(words) for _ in range(rng.randint(article_words // 2, article_words * 3 // 2))) + "." for id in articles_ids}
+
+        self.classification_items = [{"id": f"c{i}", "label": i % 2, "article": {"id": id, "text": self.articles[id]}} for i, id in enumerate(articles_ids)]
+        self.qas = {disease["id"]: [self._qa(rng, disease, id) for id in self.search_results[disease["names"][0]][:5]] for disease in self.diseases}
+
+        self.uploads: Dict[str, list] = {}
+        self.requests = Counter()
+
+    def transport(self) -> httpx.AsyncBaseTransport:
+        return httpx.MockTransport(self._handle_async)
+
+    async def _handle_async(self, request: httpx.Request) -> httpx.Response:
+        if self._latency_seconds:
+            await asyncio.sleep(self._latency_seconds)
+
+        payload = json.loads(request.content)
+        operation = re.search(r"(?:query|mutation)\s+(\w+)", payload["query"]).group(1)
+        variables = payload.get("variables", {})
+        self.requests[operation] += 1
+
+        if operation == "ListDiseases":
+            data = {"diseases": self.diseases}
+        elif operation == "SearchArticles":
+            disease_name = re.search(r'"([^"]+)"\[Title', variables["term"]).group(1)
+            data = {"searchArticles": self.search_results.get(disease_name, [])[:variables["limit"]]}
+        elif operation == "Articles":
+            data = {"articles": [{"id": id, "text": self.articles[id]} for id in variables["ids"] if id in self.articles]}
+        elif operation == "Article":
+            data = {"article": {"text": self.articles[variables["id"]]}}
+        elif operation in ["ListClassificationItems", "ListClassificationItemsRefs"]:
+            data = {"classificationItems": self.classification_items}
+        elif operation in ["ListQuestionsAnswersByDisease", "ListQuestionsAnswersRefsByDisease"]:
+            data = {"qas": self.qas.get(variables["diseaseId"], [])}
+        elif operation == "UpdateRiskFactors":
+            self.uploads[variables["diseaseId"]] = variables["riskFactors"]
+            data = {"updateRiskFactors": {"_stub": "ok"}}
+        else:
+            return httpx.Response(200, json={"data": None, "errors": [{"message": f"Unsupported operation {operation}"}]})
+
+        return httpx.Response(200, json={"data": data})
+
+    def _qa(self, rng: random.Random, disease: dict, article_id: str) -> dict:
+        text = self.articles[article_id]
+        words = text.split(" ")
+        answer_start_word = rng.randrange(len(words))
+        answer_text = " ".join(words[answer_start_word:answer_start_word + rng.randint(1, 4)])
+        return {"id": f"{disease['id']}-{article_id}", "article": {"id": article_id, "text": text},
+                "questions": [{"id": f"{disease['id']}-{article_id}-q", "text": f"What are the risk factors of {disease['names'][0]}?",
+                               "answers": [{"answer_start": text.index(answer_text), "text": answer_text}]}]}
@@ -0,0 +1,202 @@
+import asyncio
+import inspect
+import os
+import resource
+import time
+from argparse import Namespace
+from typing import List
+
+import httpx
+import torch
+from dependency_injector import providers
+
+from benchmarks.offline.fake_graph_server import FAKE_GRAPH_URL, FakeGraphServer
+from benchmarks.offline.tiny_models import BINARY_CLASSIFICATION_DIRECTORY, QUESTION_ANSWERING_DIRECTORY, save_tiny_models, synthetic_words
+from thesis_diseases_risk_factors.graph.client import Client
+from thesis_diseases_risk_factors.root_container import RootContainer
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "diseases_risk_factors", "config.yaml")
+
+TRAINED_MODELS_DIRECTORY = "trained_models"
+
+# The warm up article isn't served by the fake server, so it doesn't hit the caches of the timed articles
+WARM_UP_ARTICLE = ("warm-up", "warm up article.")
+
+
+def prepare_work_path(work_path: str, options: Namespace) -> None:
+    """
+    Saves the models of the benchmark, they are shared by the scenarios
+    """
+    words = synthetic_words(options.seed)
+    server = _fake_graph_server(words, options)
+    save_tiny_models(os.path.join(work_path, TRAINED_MODELS_DIRECTORY), words, options.model_size, options.seed,
+                     list(server.articles.values()), options.positive_ratio, options.runtime)
+
+
+def run_scenario(name: str, work_path: str, options: Namespace) -> dict:
+    """
+    Runs a scenario with its own empty caches and fake server, on the models of the work path.
+    Meant to run in its own process, so the peak RSS is the peak of the scenario alone
+    """
+    server = _fake_graph_server(synthetic_words(options.seed), options)
+    container = _build_container(os.path.join(work_path, name), os.path.join(work_path, TRAINED_MODELS_DIRECTORY), server, options)
+    result = asyncio.run(_run_async(SCENARIOS[name], container, server, options))
+
+    result["scenario"] = name
+    result["throughput"] = result["items"] / result["seconds"] if result["seconds"] > 0 else 0.0
+    result["peakRssMB"] = _peak_rss_mb()
+    # The inference pool workers are joined when the resources are shut down, their peak is the largest of them
+    result["workersPeakRssMB"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024 if options.inference_workers else 0.0
+    return result
+
+
+def _fake_graph_server(words: List[str], options: Namespace) -> FakeGraphServer:
+    # The server is deterministic, every process builds the same diseases, articles and QAs
+    return FakeGraphServer(words, options.diseases, options.articles_per_disease, options.shared_articles_ratio,
+                           options.article_words, options.latency_ms / 1000, options.seed)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _build_container(scenario_path: str, trained_save_path: str, server: FakeGraphServer, options: Namespace) -> RootContainer:
+    container = RootContainer()
+    container.config.from_yaml(CONFIG_PATH, required=True)
+    container.config.from_dict({
+        "models": {
+            "rootTrainedSavePath": trained_save_path,
+            "rootTrainedBinPath": os.path.join(scenario_path, "trained_models_bin"),
+            "binaryClassificationTrainedSavePath": os.path.join(trained_save_path, BINARY_CLASSIFICATION_DIRECTORY),
+            "questionAnsweringTrainedSavePath": os.path.join(trained_save_path, QUESTION_ANSWERING_DIRECTORY),
+            "quantizedInference": options.runtime == "int8",
+            "inferenceBackend": "onnx" if options.runtime == "onnx" else "torch",
+        },
+        "evaluation": {
+            "incremental": False,
+        },
+        "resources": {
+            "articlesCache": {"path": os.path.join(scenario_path, "cache", "articles.sqlite")},
+            "tokenizationCache": {"path": os.path.join(scenario_path, "cache", "tokenization")},
+            "predictionsCache": {"path": os.path.join(scenario_path, "cache", "predictions.sqlite")},
+            "evaluationStateStore": {"path": os.path.join(scenario_path, "cache", "evaluation_state.sqlite")},
+            "inferencePool": {"workers": options.inference_workers},
+            "metrics": {"summaryPath": os.path.join(scenario_path, "metrics", "evaluation_summary.json"), "prometheusPath": ""},
+            "logging": {"root": {"level": "WARNING"}},
+        },
+    })
+
+    # The generated client posts to the fake server through the mock transport, instead of authenticating and posting to the real server
+    graph_client = Client(FAKE_GRAPH_URL, http_client=httpx.AsyncClient(transport=server.transport()))
+    container.resources_package.graph_client.override(providers.Object(graph_client))
+    return container
+
+
+async def _run_async(scenario, container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    await container.init_resources()
+    try:
+        # The peak of the imports and the resources, before the scenario loads the models
+        baseline_rss_mb = _peak_rss_mb()
+        return dict(await scenario(container, server, options), baselineRssMB=baseline_rss_mb)
+    finally:
+        await container.shutdown_resources()
+
+
+async def _provide_async(provider):
+    # The providers that depend on the async resources return awaitables
+    instance = provider()
+    return await instance if inspect.isawaitable(instance) else instance
+
+
+def _device() -> torch.device:
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def _articles(server: FakeGraphServer, options: Namespace):
+    articles = list(server.articles.items())
+    return articles[:options.max_articles] if options.max_articles else articles
+
+
+def _question(server: FakeGraphServer) -> str:
+    return f"What are the risk factors of {server.diseases[0]['names'][0]}?"
+
+
+async def _fetch_async(container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    articles_ids = [id for id, _ in _articles(server, options)]
+    articles_fetcher = await _provide_async(container.shared_kernel_package.articles_fetcher)
+
+    start = time.perf_counter()
+    articles = await articles_fetcher.fetch_async(articles_ids)
+    seconds = time.perf_counter() - start
+
+    assert len(articles) == len(articles_ids)
+    return {"items": len(articles), "unit": "articles", "seconds": seconds, "requests": dict(server.requests)}
+
+
+async def _classify_async(container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    articles = _articles(server, options)
+    model = await _provide_async(container.binary_classification_domain_package.binary_classification_model)
+    await model.predict_async(device=_device(), articles=[WARM_UP_ARTICLE])
+
+    start = time.perf_counter()
+    positive_ids = await model.predict_async(device=_device(), articles=articles)
+    seconds = time.perf_counter() - start
+
+    return {"items": len(articles), "unit": "articles", "seconds": seconds, "positive": len(positive_ids)}
+
+
+async def _qa_async(container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    articles = _articles(server, options)
+    model = await _provide_async(container.question_answering_classification_domain_package.question_answering_model)
+    metrics = await _provide_async(container.resources_package.metrics)
+    await model.predict_articles_answers_async(device=_device(), question=_question(server), articles=[WARM_UP_ARTICLE])
+    metrics.reset()
+
+    start = time.perf_counter()
+    articles_answers = await model.predict_articles_answers_async(device=_device(), question=_question(server), articles=articles)
+    seconds = time.perf_counter() - start
+
+    counters = metrics.summary()["run"]["counters"]
+    return {"items": len(articles), "unit": "articles", "seconds": seconds, "windows": counters.get("qa_windows", 0),
+            "answers": sum(len(answers) for _, answers in articles_answers)}
+
+
+async def _post_process_async(container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    articles = _articles(server, options)
+    model = await _provide_async(container.question_answering_classification_domain_package.question_answering_model)
+    articles_answers = await model.predict_articles_answers_async(device=_device(), question=_question(server), articles=articles)
+    candidates_count = sum(len(answers) for _, answers in articles_answers)
+
+    start = time.perf_counter()
+    for _ in range(options.post_process_repeats):
+        answers = model.aggregate_answers(articles_answers)
+    seconds = time.perf_counter() - start
+
+    return {"items": candidates_count * options.post_process_repeats, "unit": "answers", "seconds": seconds, "riskFactors": len(answers)}
+
+
+async def _end_to_end_async(container: RootContainer, server: FakeGraphServer, options: Namespace) -> dict:
+    # The models are loaded before the run, like in a long running service
+    await (await _provide_async(container.binary_classification_domain_package.binary_classification_model)).predict_async(device=_device(), articles=[WARM_UP_ARTICLE])
+    await (await _provide_async(container.question_answering_classification_domain_package.question_answering_model)).predict_articles_answers_async(
+        device=_device(), question=_question(server), articles=[WARM_UP_ARTICLE])
+    models_service = await _provide_async(container.application_package.models_service)
+
+    start = time.perf_counter()
+    await models_service.evaluate_async()
+    seconds = time.perf_counter() - start
+
+    counters = (await _provide_async(container.resources_package.metrics)).summary()["run"]["counters"]
+    return {"items": len(server.diseases), "unit": "diseases", "seconds": seconds, "articles": len(server.articles),
+            "articlesPerSecond": len(server.articles) / seconds if seconds > 0 else 0.0, "uploads": len(server.uploads),
+            "requests": dict(server.requests), "counters": counters}
+
+
+SCENARIOS = {
+    "fetch": _fetch_async,
+    "classify": _classify_async,
+    "qa": _qa_async,
+    "post_process": _post_process_async,
+    "end_to_end": _end_to_end_async,
+}
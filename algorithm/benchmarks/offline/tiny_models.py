@@ -0,0 +1,86 @@
+import json
+import os
+import random
+import string
+from typing import List
+
+import numpy as np
+import torch
+from transformers import BertConfig, BertForQuestionAnswering, BertForSequenceClassification, BertTokenizerFast
+
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_export import export_onnx
+from thesis_diseases_risk_factors.infrastructure.inference.quantization import quantize_dynamic_int8, save_quantized
+
+
+# The BioBERT v1.1 architecture is BERT base, the smaller sizes keep its shape with less layers and narrower hidden states
+MODEL_SIZES = {
+    "tiny": dict(hidden_size=64, num_hidden_layers=2, num_attention_heads=2, intermediate_size=256),
+    "small": dict(hidden_size=256, num_hidden_layers=4, num_attention_heads=4, intermediate_size=1024),
+    "base": dict(hidden_size=768, num_hidden_layers=12, num_attention_heads=12, intermediate_size=3072),
+}
+
+BINARY_CLASSIFICATION_DIRECTORY = "binary_classification"
+QUESTION_ANSWERING_DIRECTORY = "question_answering"
+
+# The question answering model keeps the answers with a score of at least 1, the random logits are around 0
+_QUESTION_ANSWERING_LOGITS_SHIFT = 1.0
+
+
+def synthetic_words(seed: int, count: int = 3000) -> List[str]:
+    rng = random.Random(seed)
+    return sorted(set("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 8))) for _ in range(count)))
+
+
+def save_tiny_models(trained_save_path: str,
+    words: List[str],
+    size: str,
+    seed: int,
+    calibration_texts: List[str],
+    positive_ratio: float,
+    runtime: str = "fp32",
+    max_answer_length: int = 30) -> None:
+    """
+    Saves random weights BERT binary classification and question answering models with a cased WordPiece tokenizer of the synthetic words,
+    in the layout of the trained models directory, with their int8 states or ONNX graphs when the benchmark runs in these runtimes.
+    The heads are shifted so the evaluation goes through all of its stages, about positive_ratio of the calibration texts are classified as positive
+    and the question answering model returns answers
+    """
+    torch.manual_seed(seed)
+    os.makedirs(trained_save_path, exist_ok=True)
+    vocab_file = os.path.join(trained_save_path, "vocab.txt")
+    with open(vocab_file, "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(string.punctuation) + words))
+    tokenizer = BertTokenizerFast(vocab_file=vocab_file, do_lower_case=False)
+    os.remove(vocab_file)
+
+    config = BertConfig(vocab_size=tokenizer.vocab_size, max_position_embeddings=512, **MODEL_SIZES[size])
+    binary_classification_model = BertForSequenceClassification(config).eval()
+    question_answering_model = BertForQuestionAnswering(config).eval()
+    with torch.no_grad():
+        binary_classification_model.classifier.bias[1] -= _positive_threshold(binary_classification_model, tokenizer, calibration_texts, positive_ratio)
+        question_answering_model.qa_outputs.bias += _QUESTION_ANSWERING_LOGITS_SHIFT
+
+    for directory, model, input_names, output_names in [
+        (BINARY_CLASSIFICATION_DIRECTORY, binary_classification_model, ["input_ids", "attention_mask"], ["logits"]),
+        (QUESTION_ANSWERING_DIRECTORY, question_answering_model, ["input_ids", "token_type_ids", "attention_mask"], ["start_logits", "end_logits"])]:
+        model_path = os.path.join(trained_save_path, directory)
+        model.save_pretrained(model_path)
+        tokenizer.save_pretrained(model_path)
+        if runtime == "int8":
+            save_quantized(quantize_dynamic_int8(model), model_path, {"synthetic": True})
+        elif runtime == "onnx":
+            export_onnx(model, model_path, input_names, output_names)
+
+    with open(os.path.join(trained_save_path, QUESTION_ANSWERING_DIRECTORY, "max_answer_length.json"), "w") as f:
+        json.dump({"max_answer_length": max_answer_length}, f)
+
+
+def _positive_threshold(model: BertForSequenceClassification, tokenizer: BertTokenizerFast, texts: List[str], positive_ratio: float) -> float:
+    # The positive label wins when the difference of the logits is above the threshold
+    differences = []
+    with torch.inference_mode():
+        for text in texts:
+            logits = model(**tokenizer(text, truncation=True, max_length=512, return_tensors="pt")).logits[0]
+            differences.append((logits[1] - logits[0]).item())
+
+    return float(np.quantile(differences, 1 - positive_ratio))
@@ -0,0 +1,43 @@
+from typing import Iterable, List, Set, Tuple
+
+
+class _RunArticlesStore:
+    """
+    Articles texts and classification results of a single evaluation run.
+    The classification doesn't depend on the disease, so an article returned for several diseases is fetched and classified once per run
+    """
+    def __init__(self) -> None:
+        self._texts = {}
+        self._labels = {}
+        self._fetch_requests = 0
+        self._fetch_sent = 0
+        self._classification_requests = 0
+
+    def missing_texts(self, articles_ids: List[str]) -> List[str]:
+        # An article that failed to download has no text, so it's sent to the fetcher again when another disease requests it
+        self._fetch_requests += len(articles_ids)
+        missing_ids = list(dict.fromkeys(id for id in articles_ids if id not in self._texts))
+        self._fetch_sent += len(missing_ids)
+        return missing_ids
+
+    def add_texts(self, articles: Iterable[Tuple[str, str]]) -> None:
+        self._texts.update(articles)
+
+    def texts(self, articles_ids: List[str]) -> List[Tuple[str, str]]:
+        return [(id, self._texts[id]) for id in articles_ids if id in self._texts]
+
+    def unclassified(self, articles: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        self._classification_requests += len(articles)
+        return list(dict((id, text) for id, text in articles if id not in self._labels).items())
+
+    def add_labels(self, articles_ids: List[str], positive_ids: Set[str]) -> None:
+        self._labels.update((id, id in positive_ids) for id in articles_ids)
+
+    def positive_ids(self, articles_ids: List[str]) -> Set[str]:
+        return set(id for id in articles_ids if self._labels.get(id, False))
+
+    def report(self) -> str:
+        fetch_ratio = 1 - self._fetch_sent / self._fetch_requests if self._fetch_requests else 0.0
+        classification_ratio = 1 - len(self._labels) / self._classification_requests if self._classification_requests else 0.0
+        return (f"articles requested: {self._fetch_requests}, sent to the fetcher: {self._fetch_sent}, fetched: {len(self._texts)}, fetch dedupe ratio: {fetch_ratio:.2%}, "
+                f"classification requested: {self._classification_requests}, classified: {len(self._labels)}, classification dedupe ratio: {classification_ratio:.2%}")
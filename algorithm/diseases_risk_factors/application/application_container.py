@@ -8,6 +8,12 @@ class ApplicationContainer(containers.DeclarativeContainer):
     utils = providers.Dependency()
     http_client = providers.Dependency()
     graph_client = providers.Dependency()
+    articles_fetcher = providers.Dependency()
+    training_data_snapshot = providers.Dependency()
+    predictions_cache = providers.Dependency()
+    evaluation_state_store = providers.Dependency()
+    blocking_executor = providers.Dependency()
+    metrics = providers.Dependency()
 
     binary_classification_model = providers.Dependency()
     question_answering_model = providers.Dependency()
@@ -20,5 +26,15 @@ class ApplicationContainer(containers.DeclarativeContainer):
         http_client=http_client,
         trained_save_path=config.models.rootTrainedSavePath,
         trained_bin_path=config.models.rootTrainedBinPath,
-        utils=utils
+        utils=utils,
+        articles_fetcher=articles_fetcher,
+        training_data_snapshot=training_data_snapshot,
+        predictions_cache=predictions_cache,
+        evaluation_state_store=evaluation_state_store,
+        blocking_executor=blocking_executor,
+        metrics=metrics,
+        incremental_evaluation=config.evaluation.incremental,
+        fetch_queue_size=config.evaluation.pipeline.fetchQueueSize,
+        inference_queue_size=config.evaluation.pipeline.inferenceQueueSize,
+        upload_queue_size=config.evaluation.pipeline.uploadQueueSize
     )
\ No newline at end of file
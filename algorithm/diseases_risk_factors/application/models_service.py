@@ -1,6 +1,8 @@
+import asyncio
+import hashlib
 import logging
 import uuid
-from typing import List
+from typing import List, Optional
 import aiohttp
 import aiofiles
 import torch
@@ -9,11 +11,18 @@ import json
 import shutil
 import os
 
+from thesis_diseases_risk_factors.application._run_articles_store import _RunArticlesStore
 from thesis_diseases_risk_factors.graph.client import Client
 from thesis_diseases_risk_factors.graph.client.input_types import RiskFactorInput
 from thesis_diseases_risk_factors.domain.binary_classification.binary_classification_model import BinaryClassificationModel
 from thesis_diseases_risk_factors.domain.question_answering.question_answering_model import QuestionAnsweringModel
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.domain.shared_kernel.training_data_snapshot import TrainingDataSnapshot
 from thesis_diseases_risk_factors.domain.shared_kernel.utils import Utils
+from thesis_diseases_risk_factors.infrastructure.caching.predictions_cache import PredictionsCache
+from thesis_diseases_risk_factors.infrastructure.caching.evaluation_state_store import EvaluationStateStore
+from thesis_diseases_risk_factors.infrastructure.metrics.metrics import Metrics
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor import BlockingExecutor
 
 
 class ModelsService:
@@ -24,7 +33,17 @@ class ModelsService:
         http_client: aiohttp.ClientSession,
         trained_save_path: str,
         trained_bin_path: str,
-        utils: Utils) -> None:
+        utils: Utils,
+        articles_fetcher: ArticlesFetcher,
+        training_data_snapshot: TrainingDataSnapshot,
+        predictions_cache: PredictionsCache,
+        evaluation_state_store: EvaluationStateStore,
+        blocking_executor: BlockingExecutor,
+        metrics: Metrics,
+        incremental_evaluation: bool,
+        fetch_queue_size: int,
+        inference_queue_size: int,
+        upload_queue_size: int) -> None:
         self._logger = logging.getLogger(__name__)
         self._binary_classification_model = binary_classification_model
         self._question_answering_model = question_answering_model
@@ -33,49 +52,224 @@ class ModelsService:
         self._trained_save_path = trained_save_path
         self._trained_bin_path = trained_bin_path
         self._utils = utils
+        self._articles_fetcher = articles_fetcher
+        self._training_data_snapshot = training_data_snapshot
+        self._predictions_cache = predictions_cache
+        self._evaluation_state_store = evaluation_state_store
+        self._blocking_executor = blocking_executor
+        self._metrics = metrics
+        self._incremental_evaluation = incremental_evaluation
+        self._fetch_queue_size = fetch_queue_size
+        self._inference_queue_size = inference_queue_size
+        self._upload_queue_size = upload_queue_size
     
     async def train_async(self):
         # Set up the device
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self._logger.info("device used: [%s]", device.type)
 
+        # Both models are trained from the same version of the training data
+        await self._training_data_snapshot.prepare_async()
+
         await self._binary_classification_model.train_async(device=device)
         await self._question_answering_model.train_async(device=device)
 
         output_filename = f"{str(uuid.uuid4())}"
         output_filename_with_ext = f"{output_filename}.tar.gz"
-        self._utils.gzip_folder(self._trained_save_path, output_filename)
+        await self._blocking_executor.run_async(self._utils.gzip_folder, self._trained_save_path, output_filename)
 
         if not os.path.exists(self._trained_bin_path):
             os.mkdir(self._trained_bin_path)
 
         current_dir = os.getcwd()
-        shutil.move(f"{current_dir}/{output_filename_with_ext}", f"{current_dir}/{self._trained_bin_path}/{output_filename_with_ext}")
+        await self._blocking_executor.run_async(shutil.move, f"{current_dir}/{output_filename_with_ext}", f"{current_dir}/{self._trained_bin_path}/{output_filename_with_ext}")
+
+        # The predictions of the previous models will never be read again
+        self._predictions_cache.clear()
         
     async def evaluate_async(self):
         # Set up the device
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self._logger.info("device used: [%s]", device.type)
 
+        # The metrics cover a single evaluation run
+        self._metrics.reset()
 
         diseases_resp = await self._graph_client.list_diseases()
-        for disease in diseases_resp.diseases:
-            disease_name = disease.names[0]
-            self._logger.info(f"Learning risk factors for {disease.id} :: {disease_name}")
-            
-            # Build the search term string
-            search_term = f'"{disease_name}"[Title/Abstract/MeSH Terms] AND "Risk Factors"[Title/Abstract/MeSH Terms]'
-            articles_resp = await self._graph_client.search_articles(search_term, 1000)
-            articles_ids = articles_resp.search_articles
-            if articles_ids:
-                risk_factors_ids = await self._binary_classification_model.evaluate_async(device=device, articles_ids=articles_ids) 
+
+        # The stages are connected by bounded queues, so while a disease is in inference
+        # the next ones are searched and fetched and the previous one is uploaded
+        fetch_queue = asyncio.Queue(maxsize=self._fetch_queue_size)
+        inference_queue = asyncio.Queue(maxsize=self._inference_queue_size)
+        upload_queue = asyncio.Queue(maxsize=self._upload_queue_size)
+
+        # In incremental mode a disease is reprocessed only for the articles that weren't evaluated by the same models in the same precision
+        model_version = None
+        if self._incremental_evaluation:
+            binary_classification_version = await self._blocking_executor.run_async(self._binary_classification_model.inference_version, device)
+            question_answering_version = await self._blocking_executor.run_async(self._question_answering_model.inference_version, device)
+            model_version = f"{binary_classification_version}:{question_answering_version}"
+
+        # Each article is fetched and classified once per run, no matter for how many diseases it's returned
+        run_articles = _RunArticlesStore()
+
+        await self._run_pipeline_async([
+            self._search_stage_async(diseases_resp.diseases, model_version, fetch_queue),
+            self._fetch_stage_async(run_articles, fetch_queue, inference_queue),
+            self._inference_stage_async(device, model_version, run_articles, inference_queue, upload_queue),
+            self._upload_stage_async(upload_queue),
+        ])
+
+        self._logger.info(run_articles.report())
+
+        summary = self._metrics.write()
+        self._logger.info(f"evaluation run took {summary['seconds']:.1f}s, counters: {summary['run']['counters']}")
+
+    async def _run_pipeline_async(self, stages):
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # A failed stage stops the whole pipeline, otherwise the other stages would wait on their queues forever
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    async def _search_stage_async(self, diseases, model_version: str, fetch_queue: asyncio.Queue):
+        for disease in diseases:
+            with self._metrics.disease_scope(disease.id):
+                disease_name = disease.names[0]
+                self._logger.info(f"Learning risk factors for {disease.id} :: {disease_name}")
+
+                # Build the search term string
+                search_term = f'"{disease_name}"[Title/Abstract/MeSH Terms] AND "Risk Factors"[Title/Abstract/MeSH Terms]'
+                with self._metrics.timer("search"):
+                    articles_resp = await self._graph_client.search_articles(search_term, 1000)
+                articles_ids = articles_resp.search_articles
+                self._metrics.increment("diseases_searched")
+                self._metrics.increment("articles_searched", len(articles_ids))
+                if articles_ids:
+                    previous_state = self._previous_state(disease.id, model_version)
+                    if previous_state is not None and set(previous_state["articlesIds"]) == set(articles_ids):
+                        self._logger.info(f"Skipping {disease.id} :: {disease_name}, its articles weren't changed since the last evaluation")
+                        self._metrics.increment("diseases_skipped")
+                        continue
+
+                    await fetch_queue.put((disease, disease_name, articles_ids, previous_state))
+
+        await fetch_queue.put(None)
+
+    async def _fetch_stage_async(self, run_articles: _RunArticlesStore, fetch_queue: asyncio.Queue, inference_queue: asyncio.Queue):
+        while True:
+            item = await fetch_queue.get()
+            if item is None:
+                break
+
+            disease, disease_name, articles_ids, previous_state = item
+            with self._metrics.disease_scope(disease.id):
+                evaluated_ids = set(previous_state["articlesIds"]) if previous_state is not None else set()
+                new_ids = [id for id in articles_ids if id not in evaluated_ids]
+                missing_ids = run_articles.missing_texts(new_ids)
+                with self._metrics.timer("fetch"):
+                    fetched = await self._articles_fetcher.fetch_async(missing_ids)
+                run_articles.add_texts(fetched)
+                articles = run_articles.texts(new_ids)
+                # The fetch dedupe ratio of the run is 1 - articles_fetch_sent / articles_fetch_requested
+                self._metrics.increment("articles_fetch_requested", len(new_ids))
+                self._metrics.increment("articles_fetch_sent", len(missing_ids))
+                # The articles that failed to download are skipped by the fetcher
+                self._metrics.increment("articles_fetched", len(fetched))
+                self._metrics.increment("articles_fetch_failed", len(missing_ids) - len(fetched))
+
+            if articles or previous_state is not None:
+                await inference_queue.put((disease, disease_name, articles_ids, articles, previous_state))
+
+        await inference_queue.put(None)
+
+    async def _inference_stage_async(self, device: torch.device, model_version: str, run_articles: _RunArticlesStore, inference_queue: asyncio.Queue, upload_queue: asyncio.Queue):
+        while True:
+            item = await inference_queue.get()
+            if item is None:
+                break
+
+            disease, disease_name, articles_ids, articles, previous_state = item
+            with self._metrics.disease_scope(disease.id):
+                # The answers of the articles that are still returned by the search are kept from the previous evaluation
+                articles_answers = {}
+                evaluated_ids = set()
+                if previous_state is not None:
+                    current_ids = set(articles_ids)
+                    articles_answers = {id: [tuple(answer) for answer in answers] for id, answers in previous_state["articlesAnswers"].items() if id in current_ids}
+                    evaluated_ids = set(previous_state["articlesIds"]) & current_ids
+
+                unclassified_articles = run_articles.unclassified(articles)
+                if unclassified_articles:
+                    with self._metrics.timer("classification"):
+                        positive_ids = await self._binary_classification_model.predict_async(device=device, articles=unclassified_articles)
+                    self._metrics.increment("articles_classified", len(unclassified_articles))
+                    self._metrics.increment("articles_positive", len(positive_ids))
+                    run_articles.add_labels([id for id, _ in unclassified_articles], set(positive_ids))
+
+                risk_factors_ids = run_articles.positive_ids([id for id, _ in articles])
                 if risk_factors_ids:
+                    # The positive articles were already fetched for the classification, pass their texts on
+                    risk_factors_articles = [(id, text) for id, text in articles if id in risk_factors_ids]
+
                     question = f"What are the risk factors of {disease_name}?"
-                    answers_dict = await self._question_answering_model.evaluate_async(device=device, question=question, articles_ids=risk_factors_ids)
+                    with self._metrics.timer("question_answering"):
+                        articles_answers.update(await self._question_answering_model.predict_articles_answers_async(device=device, question=question, articles=risk_factors_articles))
+
+                with self._metrics.timer("aggregation"):
+                    answers_dict = self._question_answering_model.aggregate_answers([(id, articles_answers[id]) for id in dict.fromkeys(articles_ids) if id in articles_answers])
+                self._metrics.increment("risk_factors", len(answers_dict))
+
+                state = None
+                if model_version is not None:
+                    state = {
+                        "modelVersion": model_version,
+                        "articlesIds": sorted(evaluated_ids | set(id for id, _ in articles)),
+                        "articlesAnswers": {id: [[text, float(score)] for text, score in answers] for id, answers in articles_answers.items()},
+                        "riskFactorsHash": self._risk_factors_hash(answers_dict),
+                    }
 
-                    if answers_dict:
+            if answers_dict or state is not None:
+                await upload_queue.put((disease, disease_name, answers_dict, state, previous_state))
+
+        await upload_queue.put(None)
+
+    async def _upload_stage_async(self, upload_queue: asyncio.Queue):
+        while True:
+            item = await upload_queue.get()
+            if item is None:
+                break
+
+            disease, disease_name, answers_dict, state, previous_state = item
+            with self._metrics.disease_scope(disease.id):
+                if answers_dict:
+                    if previous_state is not None and previous_state["riskFactorsHash"] == state["riskFactorsHash"]:
+                        self._logger.info(f"Risk factors for {disease.id} :: {disease_name} weren't changed")
+                        self._metrics.increment("diseases_unchanged")
+                    else:
                         self._logger.info(f"Upload risk factors for {disease.id} :: {disease_name}")
                         risk_factors = []
                         for k, v in answers_dict.items():
                             risk_factors.append(RiskFactorInput(text=k, score=v["score"], articlesIds=list(v["article_ids"])))
-                        await self._graph_client.update_risk_factors(disease_id=disease.id, risk_factors=risk_factors)
\ No newline at end of file
+                        with self._metrics.timer("upload"):
+                            await self._graph_client.update_risk_factors(disease_id=disease.id, risk_factors=risk_factors)
+                        self._metrics.increment("diseases_uploaded")
+
+                # The state is saved only once the risk factors are uploaded, so a failed upload is retried by the next evaluation
+                if state is not None:
+                    self._evaluation_state_store.put(disease.id, state)
+
+    def _previous_state(self, disease_id: str, model_version: str) -> Optional[dict]:
+        if model_version is None:
+            return None
+
+        state = self._evaluation_state_store.get(disease_id)
+        return state if state is not None and state["modelVersion"] == model_version else None
+
+    def _risk_factors_hash(self, answers_dict: dict) -> str:
+        risk_factors = sorted((text, float(value["score"]), sorted(value["article_ids"])) for text, value in answers_dict.items())
+        return hashlib.sha256(json.dumps(risk_factors).encode("utf-8")).hexdigest()
\ No newline at end of file
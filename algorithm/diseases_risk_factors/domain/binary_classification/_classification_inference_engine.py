@@ -0,0 +1,41 @@
+import asyncio
+from typing import List, Tuple
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from thesis_diseases_risk_factors.domain.binary_classification._length_bucket_sampler import _LengthBucketSampler
+from thesis_diseases_risk_factors.domain.binary_classification._padding_collator import _PaddingCollator
+from thesis_diseases_risk_factors.domain.shared_kernel.inference_runner import InferenceRunner
+
+
+class _ClassificationInferenceEngine:
+    """
+    Runs the sequence classification model without a Trainer.
+    The inputs are bucketed by length and each batch is padded only to its own longest sequence, the batches are submitted together to the inference runner
+    """
+    def __init__(self,
+        inference_runner: InferenceRunner,
+        collator: _PaddingCollator,
+        batch_size: int) -> None:
+        self._inference_runner = inference_runner
+        self._collator = collator
+        self._batch_size = batch_size
+
+    async def predict_async(self, input_ids: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the predicted labels and the labels probabilities, in the order of input_ids
+        """
+        sampler = _LengthBucketSampler([len(ids) for ids in input_ids], self._batch_size)
+        batches = [(indexes, self._collator([{"input_ids": input_ids[i]} for i in indexes])) for indexes in sampler]
+
+        outputs = await asyncio.gather(*(self._inference_runner.run_async({key: value.numpy() for key, value in batch.items()}) for _, batch in batches))
+
+        probabilities = None
+        for (indexes, _), output in zip(batches, outputs):
+            logits = torch.from_numpy(output["logits"])
+            if probabilities is None:
+                probabilities = np.zeros((len(input_ids), logits.shape[-1]), dtype=np.float32)
+            probabilities[indexes] = F.softmax(logits, dim=-1).numpy()
+
+        return probabilities.argmax(axis=1), probabilities
\ No newline at end of file
@@ -0,0 +1,21 @@
+from typing import Iterator, List
+from torch.utils.data import Sampler
+
+
+class _LengthBucketSampler(Sampler):
+    """
+    Batch sampler that groups sequences of similar length into the same batch, so each batch needs little padding.
+    The batches go from the longest sequences to the shortest
+    """
+    def __init__(self,
+        lengths: List[int],
+        batch_size: int) -> None:
+        self._lengths = lengths
+        self._batch_size = batch_size
+
+    def __iter__(self) -> Iterator[List[int]]:
+        order = sorted(range(len(self._lengths)), key=lambda i: self._lengths[i], reverse=True)
+        return iter([order[i:i + self._batch_size] for i in range(0, len(order), self._batch_size)])
+
+    def __len__(self):
+        return (len(self._lengths) + self._batch_size - 1) // self._batch_size
\ No newline at end of file
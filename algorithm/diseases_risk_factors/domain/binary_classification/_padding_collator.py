@@ -0,0 +1,23 @@
+from transformers import DataCollatorWithPadding, PreTrainedTokenizerBase
+
+
+class _PaddingCollator:
+    """
+    Pads each batch to its own longest sequence and counts the real and the padding tokens it produced
+    """
+    def __init__(self, tokenizer: PreTrainedTokenizerBase) -> None:
+        self._collator = DataCollatorWithPadding(tokenizer)
+        self.tokens = 0
+        self.padding_tokens = 0
+
+    def __call__(self, features):
+        batch = self._collator(features)
+        tokens = int(batch["attention_mask"].sum())
+        self.tokens += tokens
+        self.padding_tokens += batch["attention_mask"].numel() - tokens
+        return batch
+
+    def report(self) -> str:
+        total = self.tokens + self.padding_tokens
+        padding_ratio = self.padding_tokens / total if total else 0.0
+        return f"tokens processed: {self.tokens}, padding tokens: {self.padding_tokens} ({padding_ratio:.1%} of the batches)"
\ No newline at end of file
@@ -1,35 +1,75 @@
+import copy
+import hashlib
 import logging
 import os
-from typing import List
+import time
+from typing import List, Tuple
 import aiohttp
 import torch
 from transformers import AutoTokenizer, AutoModelForSequenceClassification, TrainingArguments, Trainer
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import numpy as np
-import pandas as pd
-from datasets import Dataset
-from tenacity import retry, stop_after_attempt, wait_fixed
 
 from thesis_diseases_risk_factors.domain.binary_classification._classification_dataset import _ClassificationDataset
+from thesis_diseases_risk_factors.domain.binary_classification._classification_inference_engine import _ClassificationInferenceEngine
+from thesis_diseases_risk_factors.domain.binary_classification._padding_collator import _PaddingCollator
 from thesis_diseases_risk_factors.domain.binary_classification._binary_classifier import _BinaryClassifier
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.domain.shared_kernel.models_registry import ModelsRegistry
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_tokenizer import ArticlesTokenizer
+from thesis_diseases_risk_factors.domain.shared_kernel.inference_runner import InferenceRunner
+from thesis_diseases_risk_factors.domain.shared_kernel.training_data_snapshot import TrainingDataSnapshot
 from thesis_diseases_risk_factors.graph.client import Client
+from thesis_diseases_risk_factors.infrastructure.caching.predictions_cache import PredictionsCache
+from thesis_diseases_risk_factors.infrastructure.inference.inference_pool import InferencePool
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_export import export_onnx
+from thesis_diseases_risk_factors.infrastructure.inference.quantization import quantize_dynamic_int8, save_quantized
+from thesis_diseases_risk_factors.infrastructure.metrics.metrics import Metrics
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor import BlockingExecutor
 
 
 class BinaryClassificationModel:
+    _QUANTIZATION_REPORT_SAMPLES = 200
+
     def __init__(self,
         graph_client: Client,
         http_client: aiohttp.ClientSession,
-        trained_save_path: str) -> None:
+        articles_fetcher: ArticlesFetcher,
+        models_registry: ModelsRegistry,
+        articles_tokenizer: ArticlesTokenizer,
+        predictions_cache: PredictionsCache,
+        inference_pool: InferencePool,
+        blocking_executor: BlockingExecutor,
+        metrics: Metrics,
+        training_data_snapshot: TrainingDataSnapshot,
+        trained_save_path: str,
+        inference_batch_size: int,
+        quantized_inference: bool,
+        inference_backend: str) -> None:
         self._logger = logging.getLogger(__name__)
         self._graph_client = graph_client
         self._http_client = http_client
+        self._articles_fetcher = articles_fetcher
+        self._models_registry = models_registry
+        self._articles_tokenizer = articles_tokenizer
+        self._predictions_cache = predictions_cache
+        self._inference_pool = inference_pool
+        self._blocking_executor = blocking_executor
+        self._metrics = metrics
+        self._training_data_snapshot = training_data_snapshot
         self._trained_save_path = trained_save_path
+        self._inference_batch_size = inference_batch_size
+        self._quantized_inference = quantized_inference
+        self._inference_backend = inference_backend
         self._model_name = "risk_factors_binary_classification.pth"
 
     async def train_async(self, device: torch.device):
-        response = await self._graph_client.list_classification_items()
-        items = response.classification_items
+        # Training blocks for hours, it runs in the blocking executor so the event loop stays responsive
+        await self._blocking_executor.run_async(self._train, device)
+
+    def _train(self, device: torch.device):
+        items = self._training_data_snapshot.load_classification_items()
 
         # Separate the texts and the labels
         texts = [item.article.text for item in items]
@@ -41,9 +81,9 @@ class BinaryClassificationModel:
         tokenizer = AutoTokenizer.from_pretrained("dmis-lab/biobert-v1.1")
         model = AutoModelForSequenceClassification.from_pretrained("dmis-lab/biobert-v1.1")
 
-        # Prepare the data
-        train_encodings = tokenizer(train_texts, truncation=True, padding=True, max_length=512)
-        test_encodings = tokenizer(test_texts, truncation=True, padding=True, max_length=512)
+        # Prepare the data, padding is done per batch by the collator
+        train_encodings = tokenizer(train_texts, truncation=True, max_length=512)
+        test_encodings = tokenizer(test_texts, truncation=True, max_length=512)
 
         # Create instances of your ClassificationDataset for training and testing data
         train_dataset = _ClassificationDataset(train_encodings, train_labels)
@@ -57,14 +97,18 @@ class BinaryClassificationModel:
             per_device_train_batch_size=3,
             per_device_eval_batch_size=3,
             gradient_accumulation_steps=3,
+            group_by_length=True,
             log_level="info",
         )
 
+        collator = _PaddingCollator(tokenizer)
+
         trainer = Trainer(
             model=model,
             args=training_args,
             train_dataset=train_dataset,
             eval_dataset=test_dataset,
+            data_collator=collator,
         )
 
         torch.cuda.empty_cache()
@@ -76,6 +120,8 @@ class BinaryClassificationModel:
         predictions, labels, _ = trainer.predict(test_dataset)
         predictions = np.argmax(predictions, axis=1)
 
+        self._logger.info(f"binary classification training {collator.report()}")
+
         # Print the classification report
         self._logger.info("binary classification report")
         print(classification_report(labels, predictions))
@@ -84,50 +130,94 @@ class BinaryClassificationModel:
         os.makedirs(self._trained_save_path, exist_ok=True)
         trainer.save_model(self._trained_save_path)
         tokenizer.save_pretrained(self._trained_save_path)
+        self._quantize(trainer.model, test_encodings, test_labels)
+        export_onnx(trainer.model, self._trained_save_path, ["input_ids", "attention_mask"], ["logits"])
+        self._models_registry.invalidate(self._trained_save_path)
+
+    def _quantize(self, model, test_encodings, test_labels: List[int]):
+        """
+        Saves the int8 dynamically quantized model next to the trained model,
+        with its accuracy and CPU latency on the test articles compared to the fp32 model
+        """
+        samples = min(len(test_labels), self._QUANTIZATION_REPORT_SAMPLES)
+        models = {"fp32": copy.deepcopy(model).cpu().eval(), "int8": quantize_dynamic_int8(model)}
+
+        report = {"samples": samples}
+        for precision, precision_model in models.items():
+            correct = 0
+            with torch.inference_mode():
+                # The first forward pass allocates the buffers, it isn't part of the latency
+                if samples:
+                    precision_model(input_ids=torch.tensor([test_encodings["input_ids"][0]]))
+
+                start = time.perf_counter()
+                for i in range(samples):
+                    logits = precision_model(input_ids=torch.tensor([test_encodings["input_ids"][i]])).logits
+                    correct += int(logits.argmax(dim=-1).item() == test_labels[i])
+
+                elapsed = time.perf_counter() - start
+            report[precision] = {"accuracy": correct / samples if samples else 0.0, "secondsPerArticle": elapsed / samples if samples else 0.0}
+
+        self._logger.info(f"binary classification quantization report {report}")
+        save_quantized(models["int8"], self._trained_save_path, report)
     
     async def evaluate_async(self, device: torch.device, articles_ids: List[str]) -> List[str]:
-         # Load the trained model and tokenizer
-        model = AutoModelForSequenceClassification.from_pretrained(self._trained_save_path)
-        tokenizer = AutoTokenizer.from_pretrained(self._trained_save_path)
-
-        trainer = Trainer(
-            model=model,
-            tokenizer=tokenizer,
-        )
-
-        df = pd.DataFrame(columns=['id', 'text'])
-
-        for id in articles_ids:
-            try:
-                resp = await self._get_article_async(id)
-            except Exception as e:
-                continue
-            
-            new_row = pd.DataFrame({'id': [id], 'text': [resp.article.text]})
-            df = pd.concat([df, new_row], ignore_index=True)
-        
-        dataset = Dataset.from_pandas(df)
-
-        def tokenize_text(example):
-            return tokenizer(example['text'], truncation=True, padding=True, max_length=512)
-
-        dataset = dataset.map(tokenize_text, batched=True)
-
-        torch.cuda.empty_cache()
-
-        predictions = trainer.predict(dataset)
-        if predictions is not None and predictions.predictions is not None:
-            predicted_labels = predictions.predictions.argmax(axis=1)
-            df['label'] = predicted_labels
-
-            ids_with_label_1 = df.loc[df['label'] == 1, 'id'].tolist()
-            return ids_with_label_1
-        else:
-            return None
-    
-    @retry(
-    stop=stop_after_attempt(3), 
-    wait=wait_fixed(2)
-    )
-    async def _get_article_async(self, id: str):
-        return await self._graph_client.article(id)
+        articles = await self._articles_fetcher.fetch_async(articles_ids)
+        return await self.predict_async(device=device, articles=articles)
+
+    async def predict_async(self, device: torch.device, articles: List[Tuple[str, str]]) -> List[str]:
+         # Load the trained tokenizer, the model is loaded by the inference runner where it runs
+        tokenizer = await self._blocking_executor.run_async(self._models_registry.get_tokenizer, self._trained_save_path)
+
+        # Only the articles without a cached prediction of the current checkpoint and precision go through the model
+        inference_version = await self._blocking_executor.run_async(self.inference_version, device)
+        keys = [self._prediction_key(inference_version, id, text) for id, text in articles]
+        predictions = self._predictions_cache.get_many(keys)
+        missing = [(key, article) for key, article in zip(keys, articles) if key not in predictions]
+        self._logger.info(f"binary classification cached predictions: {len(articles) - len(missing)}, to predict: {len(missing)}")
+        self._metrics.increment("classification_cached_articles", len(articles) - len(missing))
+        self._metrics.increment("classification_predicted_articles", len(missing))
+
+        if missing:
+            collator = _PaddingCollator(tokenizer)
+            runner = InferenceRunner(self._models_registry, self._inference_pool, self._blocking_executor, self._trained_save_path, AutoModelForSequenceClassification, device, ["logits"], self._runtime(device))
+            engine = _ClassificationInferenceEngine(runner, collator, self._inference_batch_size)
+
+            # Padding is done per batch by the inference engine, the truncated articles tokens are read through the tokenization cache
+            with self._metrics.timer("classification_tokenization"):
+                encodings = await self._blocking_executor.run_async(self._articles_tokenizer.tokenize, tokenizer, [article for _, article in missing], add_special_tokens=True, max_length=512)
+            input_ids = [article_input_ids.tolist() for article_input_ids, _ in encodings]
+
+            torch.cuda.empty_cache()
+
+            with self._metrics.timer("classification_inference"):
+                predicted_labels, probabilities = await engine.predict_async(input_ids)
+            self._logger.info(f"binary classification inference {collator.report()}")
+
+            new_predictions = [(key, label, article_probabilities) for (key, _), label, article_probabilities in zip(missing, predicted_labels, probabilities)]
+            self._predictions_cache.put_many(new_predictions)
+            predictions.update((key, (label, article_probabilities)) for key, label, article_probabilities in new_predictions)
+
+        ids_with_label_1 = [id for (id, _), key in zip(articles, keys) if predictions[key][0] == 1]
+        return ids_with_label_1
+
+    def inference_version(self, device: torch.device) -> str:
+        """
+        Identifies the predictions of the model, the trained checkpoint and the runtime it runs in
+        """
+        return f"{self._models_registry.checkpoint_hash(self._trained_save_path)}:{self._runtime(device)}"
+
+    def _runtime(self, device: torch.device) -> str:
+        if self._inference_backend not in ["torch", "onnx"]:
+            raise ValueError(f"Unknown inference backend {self._inference_backend}")
+
+        # ONNX Runtime and the dynamically quantized kernels run on the CPU only
+        if device.type != "cpu":
+            return "fp32"
+        if self._inference_backend == "onnx":
+            return "onnx"
+        return "int8" if self._quantized_inference else "fp32"
+
+    def _prediction_key(self, inference_version: str, article_id: str, text: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{inference_version}:{article_id}:{text_hash}"
\ No newline at end of file
@@ -0,0 +1,53 @@
+from typing import Dict, List, Tuple
+
+from thesis_diseases_risk_factors.domain.question_answering._substring_index import _SubstringIndex
+
+
+class _AnswersAggregator:
+    """
+    Merges the articles answers into the risk factors of a disease, keeping the answers close to the best score
+    and dropping an answer contained in a better scored one.
+    The answers are visited from the best score down, so an answer is dropped when a kept answer with a strictly higher score contains it.
+    The kept answers are added to a substring index once all the answers of their score were visited,
+    each answer is checked in linear time of its length instead of against every kept answer
+    """
+    def __init__(self,
+        threshold_ratio: float) -> None:
+        self._threshold_ratio = threshold_ratio
+
+    def aggregate(self, articles_answers: List[Tuple[str, List[Tuple[str, float]]]]) -> Dict[str, dict]:
+        predicted_answers = {}
+        for example_id, answers in articles_answers:
+            for text, score in answers:
+                if text in predicted_answers:
+                    if score > predicted_answers[text]['score']:
+                        predicted_answers[text]['score'] = score
+                    predicted_answers[text]['article_ids'].add(example_id)
+                else:
+                    predicted_answers[text] = {'score': score, 'article_ids': set([example_id])}
+
+        if not predicted_answers:
+            return predicted_answers
+
+        # Keep the answers with a score of at least a ratio of the best score, higher scores first
+        threshold = max(value['score'] for value in predicted_answers.values()) * self._threshold_ratio
+        sorted_answers = sorted(((text, value) for text, value in predicted_answers.items() if value['score'] >= threshold),
+                                key=lambda item: item[1]['score'], reverse=True)
+
+        kept_answers = {}
+        index = _SubstringIndex()
+        score_answers = []
+        score = None
+        for text, value in sorted_answers:
+            # Answers of the same score don't drop each other
+            if value['score'] != score:
+                for score_text in score_answers:
+                    index.add(score_text)
+                score_answers = []
+                score = value['score']
+
+            if not index.contains(text):
+                kept_answers[text] = value
+                score_answers.append(text)
+
+        return kept_answers
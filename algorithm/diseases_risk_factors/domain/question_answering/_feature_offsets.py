@@ -0,0 +1,38 @@
+import numpy as np
+import pyarrow.compute as pc
+from datasets import Dataset
+
+
+class _FeatureOffsets:
+    """
+    The offset_mapping column of the processed features extracted once from the Arrow table.
+    All the tokens offsets are kept in a single (tokens, 2) array with -1 for the non context tokens,
+    indexing a feature returns a view of its rows
+    """
+    def __init__(self,
+        offsets: np.ndarray,
+        row_starts: np.ndarray) -> None:
+        self._offsets = offsets
+        self._row_starts = row_starts
+
+    @classmethod
+    def from_dataset(cls, dataset: Dataset, column_name: str = "offset_mapping") -> "_FeatureOffsets":
+        # The Arrow table of a selected or shuffled dataset still holds all the rows, its indices mapping picks them
+        if dataset._indices is not None:
+            dataset = dataset.select_columns([column_name]).flatten_indices()
+
+        column = dataset.data.column(column_name).combine_chunks()
+        tokens = column.flatten()
+
+        offsets = np.full((len(tokens), 2), -1, dtype=np.int64)
+        offsets[tokens.is_valid().to_numpy(zero_copy_only=False)] = tokens.flatten().to_numpy().reshape(-1, 2)
+
+        row_starts = np.zeros(len(column) + 1, dtype=np.int64)
+        np.cumsum(pc.list_value_length(column).to_numpy(zero_copy_only=False), out=row_starts[1:])
+        return cls(offsets, row_starts)
+
+    def __len__(self):
+        return len(self._row_starts) - 1
+
+    def __getitem__(self, feature_index: int) -> np.ndarray:
+        return self._offsets[self._row_starts[feature_index]:self._row_starts[feature_index + 1]]
\ No newline at end of file
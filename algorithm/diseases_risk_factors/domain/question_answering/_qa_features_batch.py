@@ -0,0 +1,19 @@
+from typing import Dict
+import numpy as np
+
+
+class _QAFeaturesBatch:
+    """
+    A batch of question answering windows: the model inputs, the (windows, max_length, 2) int32 offsets
+    with -1 for the non context tokens and the index of the example of each window
+    """
+    def __init__(self,
+        inputs: Dict[str, np.ndarray],
+        offsets: np.ndarray,
+        example_indexes: np.ndarray) -> None:
+        self.inputs = inputs
+        self.offsets = offsets
+        self.example_indexes = example_indexes
+
+    def __len__(self):
+        return len(self.example_indexes)
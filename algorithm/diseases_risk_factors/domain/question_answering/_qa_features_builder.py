@@ -0,0 +1,98 @@
+from typing import Iterator, List, Tuple
+import numpy as np
+from transformers import PreTrainedTokenizerBase
+
+from thesis_diseases_risk_factors.domain.question_answering._qa_features_batch import _QAFeaturesBatch
+
+
+class _QAFeaturesBuilder:
+    """
+    Builds the question answering features from contexts that were tokenized on their own, without special tokens.
+    Produces the same windows as tokenizing the (question, context) pairs with truncation="only_second", return_overflowing_tokens
+    and padding="max_length", so the contexts tokenization can be cached independently of the question.
+    The windows are streamed in fixed size numpy batches instead of materializing the features of all the contexts
+    """
+    def __init__(self,
+        tokenizer: PreTrainedTokenizerBase,
+        max_length: int,
+        stride: int) -> None:
+        self._tokenizer = tokenizer
+        self._max_length = max_length
+        self._stride = stride
+
+        # Locate the special tokens around the question and the context from a template of single token sequences
+        question_marker, context_marker = -1, -2
+        template = tokenizer.build_inputs_with_special_tokens([question_marker], [context_marker])
+        template_token_type_ids = tokenizer.create_token_type_ids_from_sequences([question_marker], [context_marker])
+        if len(template) - 2 != tokenizer.num_special_tokens_to_add(pair=True):
+            raise ValueError(f"Unsupported special tokens template {template} of {type(tokenizer).__name__}")
+
+        question_index, context_index = template.index(question_marker), template.index(context_marker)
+        self._prefix = template[:question_index]
+        self._middle = template[question_index + 1:context_index]
+        self._suffix = template[context_index + 1:]
+        self._prefix_token_type_ids = template_token_type_ids[:question_index]
+        self._question_token_type_id = template_token_type_ids[question_index]
+        self._middle_token_type_ids = template_token_type_ids[question_index + 1:context_index]
+        self._context_token_type_id = template_token_type_ids[context_index]
+        self._suffix_token_type_ids = template_token_type_ids[context_index + 1:]
+
+    def iter_batches(self, question: str, contexts_encodings: List[Tuple[np.ndarray, np.ndarray]], batch_size: int) -> Iterator[_QAFeaturesBatch]:
+        """
+        Yields the windows of the contexts in batches of batch_size windows, the last batch may be smaller.
+        The windows of a context are consecutive and the examples indexes are the positions of the contexts
+        """
+        question_ids = self._tokenizer(question.strip(), add_special_tokens=False)["input_ids"]
+        context_budget = self._max_length - len(question_ids) - len(self._prefix) - len(self._middle) - len(self._suffix)
+        if context_budget <= self._stride:
+            raise ValueError(f"The question is too long for max_length {self._max_length} with stride {self._stride}")
+
+        head = np.array(self._prefix + question_ids + self._middle, dtype=np.int64)
+        head_token_type_ids = np.array(self._prefix_token_type_ids + [self._question_token_type_id] * len(question_ids) + self._middle_token_type_ids, dtype=np.int64)
+        suffix = np.array(self._suffix, dtype=np.int64)
+        suffix_token_type_ids = np.array(self._suffix_token_type_ids, dtype=np.int64)
+        context_start = len(head)
+
+        batch = self._new_batch(batch_size)
+        row = 0
+        for example_index, (context_ids, context_offsets) in enumerate(contexts_encodings):
+            for start, stop in self._windows(len(context_ids), context_budget):
+                context_stop = context_start + stop - start
+                length = context_stop + len(suffix)
+
+                batch.inputs["input_ids"][row, :context_start] = head
+                batch.inputs["input_ids"][row, context_start:context_stop] = context_ids[start:stop]
+                batch.inputs["input_ids"][row, context_stop:length] = suffix
+                batch.inputs["token_type_ids"][row, :context_start] = head_token_type_ids
+                batch.inputs["token_type_ids"][row, context_start:context_stop] = self._context_token_type_id
+                batch.inputs["token_type_ids"][row, context_stop:length] = suffix_token_type_ids
+                batch.inputs["attention_mask"][row, :length] = 1
+                batch.offsets[row, context_start:context_stop] = context_offsets[start:stop]
+                batch.example_indexes[row] = example_index
+
+                row += 1
+                if row == batch_size:
+                    yield batch
+                    batch = self._new_batch(batch_size)
+                    row = 0
+
+        if row > 0:
+            yield _QAFeaturesBatch({name: values[:row] for name, values in batch.inputs.items()}, batch.offsets[:row], batch.example_indexes[:row])
+
+    def _new_batch(self, batch_size: int) -> _QAFeaturesBatch:
+        inputs = {"input_ids": np.full((batch_size, self._max_length), self._tokenizer.pad_token_id, dtype=np.int64),
+                  "token_type_ids": np.zeros((batch_size, self._max_length), dtype=np.int64),
+                  "attention_mask": np.zeros((batch_size, self._max_length), dtype=np.int64)}
+        offsets = np.full((batch_size, self._max_length, 2), -1, dtype=np.int32)
+        return _QAFeaturesBatch(inputs, offsets, np.zeros(batch_size, dtype=np.int32))
+
+    def _windows(self, context_length: int, context_budget: int) -> List[Tuple[int, int]]:
+        # The overflowing windows of the tokenizers library, each window starts context_budget - stride tokens after the previous one
+        windows = []
+        for start in range(0, max(context_length, 1), context_budget - self._stride):
+            stop = min(start + context_budget, context_length)
+            windows.append((start, stop))
+            if stop == context_length:
+                break
+
+        return windows
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Dict
+import numpy as np
+
+from thesis_diseases_risk_factors.domain.shared_kernel.inference_runner import InferenceRunner
+
+
+class _QAWindowBatcher:
+    """
+    Batches the windows of a question for the inference runner and counts the tokens they compute.
+    With trim_padding the windows are sorted by their number of real tokens and each batch is cut to its longest window,
+    so the padding tails of the last windows of the articles aren't computed. The logits of the cut positions are -inf,
+    they are never selected as answer candidates.
+    The question segment is counted but not reused, BERT attends in both directions so its states depend on the context of each window
+    """
+    def __init__(self,
+        batch_size: int,
+        trim_padding: bool) -> None:
+        self._batch_size = batch_size
+        self._trim_padding = trim_padding
+        self.windows = 0
+        self.tokens = 0
+        self.computed_tokens = 0
+        self.question_tokens = 0
+
+    async def run_async(self, inference_runner: InferenceRunner, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Returns the outputs of all the windows, in the order of the inputs and with the full max_length positions
+        """
+        attention_mask = inputs["attention_mask"]
+        windows_count, max_length = attention_mask.shape
+        lengths = attention_mask.sum(axis=1)
+        order = np.argsort(-lengths, kind="stable") if self._trim_padding else np.arange(windows_count)
+
+        batches = []
+        for i in range(0, windows_count, self._batch_size):
+            indexes = order[i:i + self._batch_size]
+            batches.append((indexes, int(lengths[indexes].max()) if self._trim_padding else max_length))
+
+        outputs = await asyncio.gather(*(inference_runner.run_async({name: values[indexes, :length] for name, values in inputs.items()})
+                                         for indexes, length in batches))
+
+        results = {}
+        for (indexes, length), output in zip(batches, outputs):
+            for name, values in output.items():
+                if name not in results:
+                    results[name] = np.full((windows_count, max_length) + values.shape[2:], -np.inf, dtype=values.dtype)
+                results[name][indexes, :length] = values
+
+        self.windows += windows_count
+        self.tokens += int(lengths.sum())
+        self.computed_tokens += sum(len(indexes) * length for indexes, length in batches)
+        if "token_type_ids" in inputs:
+            self.question_tokens += int(((inputs["token_type_ids"] == 0) & (attention_mask == 1)).sum())
+
+        return results
+
+    def report(self) -> str:
+        padding_ratio = 1 - self.tokens / self.computed_tokens if self.computed_tokens else 0.0
+        question_ratio = self.question_tokens / self.tokens if self.tokens else 0.0
+        return (f"windows: {self.windows}, computed tokens: {self.computed_tokens}, padding tokens: {self.computed_tokens - self.tokens} ({padding_ratio:.1%}), "
+                f"question segment tokens: {self.question_tokens} ({question_ratio:.1%} of the real tokens)")
@@ -0,0 +1,60 @@
+from typing import Dict, List, Optional, Sequence, Union
+import numpy as np
+
+
+class _SpanScorer:
+    """
+    Scores the n_best x n_best candidate answer spans of a feature at once.
+    A span is kept when both of its tokens are in the context, it doesn't end before it starts and its text isn't longer than max_answer_length.
+    The spans are returned in the same order as iterating the start indexes and then the end indexes from the highest logit down
+    """
+    def __init__(self,
+        n_best: int,
+        max_answer_length: int) -> None:
+        self._n_best = n_best
+        self._max_answer_length = max_answer_length
+
+    def score(self,
+        start_logit: np.ndarray,
+        end_logit: np.ndarray,
+        offsets: Union[np.ndarray, Sequence[Optional[Sequence[int]]]],
+        context: str) -> List[Dict]:
+        """
+        offsets is either the feature offset mapping with None for the non context tokens
+        or a (tokens, 2) array with negative offsets for the non context tokens
+        """
+        start_indexes = self._top_k(start_logit)
+        end_indexes = self._top_k(end_logit)
+        candidates_offsets = self._take(offsets, np.concatenate((start_indexes, end_indexes)))
+        start_offsets = candidates_offsets[:len(start_indexes)]
+        end_offsets = candidates_offsets[len(start_indexes):]
+        span_starts = start_offsets[:, 0]
+        span_ends = end_offsets[:, 1]
+
+        # Skip answers that are not fully in the context
+        mask = (span_starts >= 0)[:, None] & (end_offsets[:, 0] >= 0)[None, :]
+        # Skip answers with a length that is either < 0 or > max_answer_length
+        mask &= end_indexes[None, :] >= start_indexes[:, None]
+        context_length = len(context)
+        text_lengths = np.minimum(span_ends, context_length)[None, :] - np.minimum(span_starts, context_length)[:, None]
+        mask &= np.maximum(text_lengths, 0) <= self._max_answer_length
+
+        rows, columns = np.nonzero(mask)
+        scores = start_logit[start_indexes[rows]] + end_logit[end_indexes[columns]]
+        text_starts = span_starts[rows].tolist()
+        text_ends = span_ends[columns].tolist()
+
+        return [{"text": context[text_start : text_end], "logit_score": score}
+                for text_start, text_end, score in zip(text_starts, text_ends, scores)]
+
+    def _top_k(self, logits: np.ndarray) -> np.ndarray:
+        k = min(self._n_best, len(logits))
+        top = np.sort(np.argpartition(logits, len(logits) - k)[len(logits) - k:])
+        return top[np.argsort(logits[top], kind="stable")[::-1]]
+
+    @staticmethod
+    def _take(offsets, indexes: np.ndarray) -> np.ndarray:
+        if isinstance(offsets, np.ndarray):
+            return offsets[indexes]
+
+        return np.array([offsets[i] if offsets[i] is not None else (-1, -1) for i in indexes.tolist()], dtype=np.int64).reshape(-1, 2)
\ No newline at end of file
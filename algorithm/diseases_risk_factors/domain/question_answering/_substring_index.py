@@ -0,0 +1,69 @@
+class _SubstringIndex:
+    """
+    Generalized suffix automaton of a growing set of strings.
+    Answers whether a text is a substring of any of the added strings in linear time of the text, adding a string is linear in its length
+    """
+    def __init__(self) -> None:
+        self._transitions = [{}]
+        self._links = [-1]
+        self._lengths = [0]
+        self._strings_count = 0
+
+    def add(self, text: str) -> None:
+        last = 0
+        for char in text:
+            last = self._extend(last, char)
+        self._strings_count += 1
+
+    def contains(self, text: str) -> bool:
+        # Like str.find, the empty text is contained in any string
+        if self._strings_count == 0:
+            return False
+
+        state = 0
+        for char in text:
+            state = self._transitions[state].get(char)
+            if state is None:
+                return False
+
+        return True
+
+    def _extend(self, last: int, char: str) -> int:
+        transitions, links, lengths = self._transitions, self._links, self._lengths
+
+        # The substring already ends in a state of a previous string
+        if char in transitions[last]:
+            state = transitions[last][char]
+            if lengths[last] + 1 == lengths[state]:
+                return state
+            return self._split(last, char, state)
+
+        current = len(transitions)
+        transitions.append({})
+        links.append(0)
+        lengths.append(lengths[last] + 1)
+
+        previous = last
+        while previous != -1 and char not in transitions[previous]:
+            transitions[previous][char] = current
+            previous = links[previous]
+
+        if previous != -1:
+            state = transitions[previous][char]
+            links[current] = state if lengths[previous] + 1 == lengths[state] else self._split(previous, char, state)
+
+        return current
+
+    def _split(self, previous: int, char: str, state: int) -> int:
+        transitions, links, lengths = self._transitions, self._links, self._lengths
+        clone = len(transitions)
+        transitions.append(dict(transitions[state]))
+        links.append(links[state])
+        lengths.append(lengths[previous] + 1)
+        links[state] = clone
+
+        while previous != -1 and transitions[previous].get(char) == state:
+            transitions[previous][char] = clone
+            previous = links[previous]
+
+        return clone
@@ -8,10 +8,29 @@ class QuestionAnsweringContainer(containers.DeclarativeContainer):
     utils = providers.Dependency()
     graph_client = providers.Dependency()
     http_client = providers.Dependency()
+    articles_fetcher = providers.Dependency()
+    models_registry = providers.Dependency()
+    articles_tokenizer = providers.Dependency()
+    training_data_snapshot = providers.Dependency()
+    inference_pool = providers.Dependency()
+    blocking_executor = providers.Dependency()
+    metrics = providers.Dependency()
 
     question_answering_model = providers.Factory(
         QuestionAnsweringModel,
         graph_client=graph_client,
         http_client=http_client,
-        trained_save_path=config.questionAnsweringTrainedSavePath
+        articles_fetcher=articles_fetcher,
+        models_registry=models_registry,
+        articles_tokenizer=articles_tokenizer,
+        training_data_snapshot=training_data_snapshot,
+        inference_pool=inference_pool,
+        blocking_executor=blocking_executor,
+        metrics=metrics,
+        trained_save_path=config.questionAnsweringTrainedSavePath,
+        inference_batch_size=config.questionAnsweringInferenceBatchSize,
+        quantized_inference=config.quantizedInference,
+        inference_backend=config.inferenceBackend,
+        trim_padding=config.questionAnsweringTrimPadding,
+        windows_chunk_size=config.questionAnsweringWindowsChunkSize
     )
@@ -1,7 +1,9 @@
+import copy
 import logging
 import os
 import json
-from typing import List
+import time
+from typing import Dict, List, Tuple
 import collections
 import aiohttp
 import torch
@@ -14,10 +16,25 @@ from tqdm.auto import tqdm
 import evaluate
 import torch.nn.functional as F
 from random import shuffle
-from tenacity import retry, stop_after_attempt, wait_fixed
 
+from thesis_diseases_risk_factors.domain.question_answering._answers_aggregator import _AnswersAggregator
 from thesis_diseases_risk_factors.domain.question_answering._qa_dataset import _QADataset
+from thesis_diseases_risk_factors.domain.question_answering._span_scorer import _SpanScorer
+from thesis_diseases_risk_factors.domain.question_answering._feature_offsets import _FeatureOffsets
+from thesis_diseases_risk_factors.domain.question_answering._qa_features_batch import _QAFeaturesBatch
+from thesis_diseases_risk_factors.domain.question_answering._qa_features_builder import _QAFeaturesBuilder
+from thesis_diseases_risk_factors.domain.question_answering._qa_window_batcher import _QAWindowBatcher
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.domain.shared_kernel.models_registry import ModelsRegistry
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_tokenizer import ArticlesTokenizer
+from thesis_diseases_risk_factors.domain.shared_kernel.inference_runner import InferenceRunner
+from thesis_diseases_risk_factors.domain.shared_kernel.training_data_snapshot import TrainingDataSnapshot
 from thesis_diseases_risk_factors.graph.client import Client, ListQuestionsAnswersByDiseaseQas
+from thesis_diseases_risk_factors.infrastructure.inference.inference_pool import InferencePool
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_export import export_onnx
+from thesis_diseases_risk_factors.infrastructure.inference.quantization import quantize_dynamic_int8, save_quantized
+from thesis_diseases_risk_factors.infrastructure.metrics.metrics import Metrics
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor import BlockingExecutor
 
 
 n_best = 20
@@ -28,39 +45,66 @@ that are in the context and with a length that is within a given range.
 """
 
 class QuestionAnsweringModel:
+    _QUANTIZATION_REPORT_EXAMPLES = 100
+
     def __init__(self,
         graph_client: Client,
         http_client: aiohttp.ClientSession,
-        trained_save_path: str) -> None:
+        articles_fetcher: ArticlesFetcher,
+        models_registry: ModelsRegistry,
+        articles_tokenizer: ArticlesTokenizer,
+        training_data_snapshot: TrainingDataSnapshot,
+        inference_pool: InferencePool,
+        blocking_executor: BlockingExecutor,
+        metrics: Metrics,
+        trained_save_path: str,
+        inference_batch_size: int,
+        quantized_inference: bool,
+        inference_backend: str,
+        trim_padding: bool,
+        windows_chunk_size: int) -> None:
         self._logger = logging.getLogger(__name__)
         self._graph_client = graph_client
         self._http_client = http_client
+        self._articles_fetcher = articles_fetcher
+        self._models_registry = models_registry
+        self._articles_tokenizer = articles_tokenizer
+        self._training_data_snapshot = training_data_snapshot
+        self._inference_pool = inference_pool
+        self._blocking_executor = blocking_executor
+        self._metrics = metrics
         self._trained_save_path = trained_save_path
+        self._inference_batch_size = inference_batch_size
+        self._quantized_inference = quantized_inference
+        self._inference_backend = inference_backend
+        self._trim_padding = trim_padding
+        self._windows_chunk_size = windows_chunk_size
         self._max_answer_length_full_file_name = os.path.join(self._trained_save_path, "max_answer_length.json")
 
     async def train_async(self, device: torch.device):
-        diseases_response = await self._graph_client.list_diseases()
+        # Training blocks for hours, it runs in the blocking executor so the event loop stays responsive
+        await self._blocking_executor.run_async(self._train, device)
 
-        # Get a list of all disease IDs
-        all_disease_ids = [disease.id for disease in diseases_response.diseases]
+    def _train(self, device: torch.device):
+        # Get a list of all disease IDs and their QAs from the local training data snapshot
+        all_disease_ids, diseases_qas = self._training_data_snapshot.load_diseases_qas()
 
         # Shuffle this list to randomize
         shuffle(all_disease_ids)
 
         # Perform an 80-20 split on disease IDs
         train_size = int(0.8 * len(all_disease_ids))
-        train_disease_ids = all_disease_ids[:train_size]
-        test_disease_ids = all_disease_ids[train_size:]
+        train_disease_ids = set(all_disease_ids[:train_size])
+        test_disease_ids = set(all_disease_ids[train_size:])
 
         # Create empty lists to hold training and testing data
         temp_train_data = []
         test_data = []
 
         for disease_id in all_disease_ids:
-            # self._logger.info(f"Loading {disease.names[0]} QAs items")
-            qas_response = await self._graph_client.list_questions_answers_by_disease(disease_id=disease_id)
-            if qas_response.qas:
-                for qa in qas_response.qas:
+            qas = diseases_qas.get(disease_id)
+            if qas:
+                for qa in qas:
                     if len(qa.questions) == 0:
                         continue
 
@@ -290,10 +334,47 @@ class QuestionAnsweringModel:
         os.makedirs(self._trained_save_path, exist_ok=True)
         trainer.save_model(self._trained_save_path)
         tokenizer.save_pretrained(self._trained_save_path)
+        self._quantize(trainer.model, validation_dataset, raw_datasets["validation"], max_answer_length)
+        export_onnx(trainer.model, self._trained_save_path, ["input_ids", "token_type_ids", "attention_mask"], ["start_logits", "end_logits"])
 
         with open(self._max_answer_length_full_file_name, 'w') as f:
             json.dump({'max_answer_length': max_answer_length}, f)
+
+        # The checkpoint hash covers all the saved artifacts, it's dropped once the last of them is written
+        self._models_registry.invalidate(self._trained_save_path)
     
+    def _quantize(self, model, features: Dataset, examples: Dataset, max_answer_length: int):
+        """
+        Saves the int8 dynamically quantized model next to the trained model,
+        with its exact match, F1 and CPU latency on the validation examples compared to the fp32 model
+        """
+        examples = examples.select(range(min(len(examples), self._QUANTIZATION_REPORT_EXAMPLES)))
+        examples_ids = set(examples["id"])
+        features = features.select([i for i, example_id in enumerate(features["example_id"]) if example_id in examples_ids])
+        inputs = {name: torch.tensor(features[name]) for name in ["input_ids", "token_type_ids", "attention_mask"]}
+        models = {"fp32": copy.deepcopy(model).cpu().eval(), "int8": quantize_dynamic_int8(model)}
+
+        report = {"examples": len(examples), "features": len(features)}
+        for precision, precision_model in models.items():
+            start_logits, end_logits = [], []
+            with torch.inference_mode():
+                # The first forward pass allocates the buffers, it isn't part of the latency
+                if len(features):
+                    precision_model(**{name: values[:self._inference_batch_size] for name, values in inputs.items()})
+
+                start = time.perf_counter()
+                for i in range(0, len(features), self._inference_batch_size):
+                    outputs = precision_model(**{name: values[i:i + self._inference_batch_size] for name, values in inputs.items()})
+                    start_logits.append(outputs.start_logits.float().numpy())
+                    end_logits.append(outputs.end_logits.float().numpy())
+
+                elapsed = time.perf_counter() - start
+            metrics = self._compute_metrics(np.concatenate(start_logits), np.concatenate(end_logits), features, examples, max_answer_length) if len(features) else {}
+            report[precision] = {**metrics, "secondsPerFeature": elapsed / len(features) if len(features) else 0.0}
+
+        self._logger.info(f"question answering quantization report {report}")
+        save_quantized(models["int8"], self._trained_save_path, report)
+
     def _create_df(self, data):
         rows = []
         for entry in data:
@@ -311,43 +392,21 @@ class QuestionAnsweringModel:
     
     def _compute_metrics(self, start_logits, end_logits, features, examples, max_answer_length):
             metric = evaluate.load("squad")
+            span_scorer = _SpanScorer(n_best, max_answer_length)
 
+            # Read the features columns once instead of materializing a row per feature
+            features_offsets = _FeatureOffsets.from_dataset(features)
             example_to_features = collections.defaultdict(list)
-            for idx, feature in enumerate(features):
-                example_to_features[feature["example_id"]].append(idx)
+            for idx, example_id in enumerate(features["example_id"]):
+                example_to_features[example_id].append(idx)
 
             predicted_answers = []
-            for example in tqdm(examples):
-                example_id = example["id"]
-                context = example["context"]
+            for example_id, context in tqdm(zip(examples["id"], examples["context"]), total=len(examples)):
                 answers = []
 
                 # Loop through all features associated with that example
                 for feature_index in example_to_features[example_id]:
-                    start_logit = start_logits[feature_index]
-                    end_logit = end_logits[feature_index]
-                    offsets = features[feature_index]["offset_mapping"]
-
-                    start_indexes = np.argsort(start_logit)[-1 : -n_best - 1 : -1].tolist()
-                    end_indexes = np.argsort(end_logit)[-1 : -n_best - 1 : -1].tolist()
-                    for start_index in start_indexes:
-                        for end_index in end_indexes:
-                            # Skip answers that are not fully in the context
-                            if offsets[start_index] is None or offsets[end_index] is None:
-                                continue
-                            # Skip answers with a length that is either < 0 or > max_answer_length
-                            if end_index < start_index:
-                                continue
-
-                            text = context[offsets[start_index][0] : offsets[end_index][1]]
-                            if len(text) > max_answer_length:
-                                continue
-
-                            answer = {
-                                "text": text,
-                                "logit_score": start_logit[start_index] + end_logit[end_index],
-                            }
-                            answers.append(answer)
+                    answers.extend(span_scorer.score(start_logits[feature_index], end_logits[feature_index], features_offsets[feature_index], context))
 
                 # Select the answer with the best score
                 if len(answers) > 0:
@@ -358,176 +417,108 @@ class QuestionAnsweringModel:
                 else:
                     predicted_answers.append({"id": example_id, "prediction_text": ""})
 
-            theoretical_answers = [{"id": ex["id"], "answers": ex["answers"]} for ex in examples]
+            theoretical_answers = [{"id": id, "answers": answers} for id, answers in zip(examples["id"], examples["answers"])]
             return metric.compute(predictions=predicted_answers, references=theoretical_answers)
 
     async def evaluate_async(self, device: torch.device, question: str, articles_ids: List[str]):
-        # Load the trained model and tokenizer
-        model = AutoModelForQuestionAnswering.from_pretrained(self._trained_save_path)
-        tokenizer = AutoTokenizer.from_pretrained(self._trained_save_path)
+        articles = await self._articles_fetcher.fetch_async(articles_ids)
+        return await self.predict_async(device=device, question=question, articles=articles)
+
+    async def predict_async(self, device: torch.device, question: str, articles: List[Tuple[str, str]]):
+        articles_answers = await self.predict_articles_answers_async(device=device, question=question, articles=articles)
+        return self.aggregate_answers(articles_answers)
+
+    def inference_version(self, device: torch.device) -> str:
+        """
+        Identifies the predictions of the model, the trained checkpoint, the runtime it runs in and whether the windows padding is computed
+        """
+        version = f"{self._models_registry.checkpoint_hash(self._trained_save_path)}:{self._runtime(device)}"
+        return f"{version}:trimmed" if self._trim_padding else version
+
+    def _runtime(self, device: torch.device) -> str:
+        if self._inference_backend not in ["torch", "onnx"]:
+            raise ValueError(f"Unknown inference backend {self._inference_backend}")
+
+        # ONNX Runtime and the dynamically quantized kernels run on the CPU only
+        if device.type != "cpu":
+            return "fp32"
+        if self._inference_backend == "onnx":
+            return "onnx"
+        return "int8" if self._quantized_inference else "fp32"
+
+    async def predict_articles_answers_async(self, device: torch.device, question: str, articles: List[Tuple[str, str]]) -> List[Tuple[str, List[Tuple[str, float]]]]:
+        """
+        Returns the (lower cased text, score) answers of each article, in the order of articles.
+        Keeps the top answers of each article that pass the minimal score.
+        The windows are built, run and scored a chunk at a time, the features of all the articles are never materialized together
+        """
+        # The tokenization, the windows building and the answers extraction are CPU bound and run in the blocking executor
+        with self._metrics.timer("qa_tokenization"):
+            features_builder, contexts_encodings = await self._blocking_executor.run_async(self._tokenize_contexts, articles)
+        span_scorer = _SpanScorer(n_best, await self._blocking_executor.run_async(self._load_max_answer_length))
 
-        max_answer_length = 0
-        with open(self._max_answer_length_full_file_name, 'r') as f:
-            data = json.load(f)
-            max_answer_length = data['max_answer_length']
-        
-        self._logger.info(f"max_answer_length: {max_answer_length}")
-
-        rows = []
-        for idx, article_id in enumerate(articles_ids):
-            try:
-                resp = await self._get_article_async(article_id)
-                context = resp.article.text
-                row = {'id': article_id, 'context': context, 'question': question}
-                rows.append(row)
-            except Exception as e:
-                continue
-        
-        df = pd.DataFrame(rows)
-        dataset = Dataset.from_pandas(df)
-
-        max_length = 384
-        stride = 128
-
-        def preprocess_examples(examples):
-            questions = [q.strip() for q in examples["question"]]
-            inputs = tokenizer(
-                questions,
-                examples["context"],
-                max_length=max_length,
-                truncation="only_second",
-                stride=stride,
-                return_overflowing_tokens=True,
-                return_offsets_mapping=True,
-                padding="max_length",
-            )
-
-            sample_map = inputs.pop("overflow_to_sample_mapping")
-            example_ids = []
-
-            for i in range(len(inputs["input_ids"])):
-                sample_idx = sample_map[i]
-                example_ids.append(examples["id"][sample_idx])
-
-                sequence_ids = inputs.sequence_ids(i)
-                offset = inputs["offset_mapping"][i]
-                inputs["offset_mapping"][i] = [
-                    o if sequence_ids[k] == 1 else None for k, o in enumerate(offset)
-                ]
-
-            inputs["example_id"] = example_ids
-            return inputs
-        
-        processed_dataset = dataset.map(
-            preprocess_examples,
-            batched=True,
-            remove_columns=dataset.column_names,
-        )
-
-        trainer = Trainer(
-            model=model,
-            tokenizer=tokenizer,
-        )
-        
         torch.cuda.empty_cache()
 
-        predictions, _, _ = trainer.predict(processed_dataset)
-        start_logits, end_logits = predictions
-
-        example_to_features = collections.defaultdict(list)
-        for idx, feature in enumerate(processed_dataset):
-            example_to_features[feature["example_id"]].append(idx)
-
-        predicted_answers = {}
-        for example in tqdm(dataset):
-            example_id = example["id"]
-            context = example["context"]
-            answers = []
-
-            # Loop through all features associated with that example
-            for feature_index in example_to_features[example_id]:
-                start_logit = start_logits[feature_index]
-                end_logit = end_logits[feature_index]
-                offsets = processed_dataset[feature_index]["offset_mapping"]
-
-                start_indexes = np.argsort(start_logit)[-1 : -n_best - 1 : -1].tolist()
-                end_indexes = np.argsort(end_logit)[-1 : -n_best - 1 : -1].tolist()
-                for start_index in start_indexes:
-                    for end_index in end_indexes:
-                        # Skip answers that are not fully in the context
-                        if offsets[start_index] is None or offsets[end_index] is None:
-                            continue
-                        # Skip answers with a length that is either < 0 or > max_answer_length
-                        if end_index < start_index:
-                                continue
-
-                        text = context[offsets[start_index][0] : offsets[end_index][1]]
-                        if len(text) > max_answer_length:
-                            continue
-
-                        answer = {
-                            "text": text,
-                            "logit_score": start_logit[start_index] + end_logit[end_index],
-                        }
-                        answers.append(answer)
-            
+        # The windows of each chunk are batched together and submitted to the inference runner
+        runner = InferenceRunner(self._models_registry, self._inference_pool, self._blocking_executor, self._trained_save_path, AutoModelForQuestionAnswering, device, ["start_logits", "end_logits"], self._runtime(device))
+        window_batcher = _QAWindowBatcher(self._inference_batch_size, self._trim_padding)
+        articles_answers = [[] for _ in articles]
+        features_batches = features_builder.iter_batches(question, contexts_encodings, self._windows_chunk_size)
+        while True:
+            with self._metrics.timer("qa_windows_building"):
+                features_batch = await self._blocking_executor.run_async(next, features_batches, None)
+            if features_batch is None:
+                break
+
+            with self._metrics.timer("qa_inference"):
+                outputs = await window_batcher.run_async(runner, features_batch.inputs)
+            with self._metrics.timer("qa_post_processing"):
+                await self._blocking_executor.run_async(self._score_spans, span_scorer, articles, features_batch, outputs, articles_answers)
+
+        self._logger.info(f"question answering inference {window_batcher.report()}")
+        self._metrics.increment("qa_articles", len(articles))
+        self._metrics.increment("qa_windows", window_batcher.windows)
+        self._metrics.increment("qa_computed_tokens", window_batcher.computed_tokens)
+
+        with self._metrics.timer("qa_post_processing"):
             max_answers = 10
             # Select the top k answers with the best scores
-            if len(answers) > 0:
+            top_k_answers = []
+            for (article_id, _), answers in zip(articles, articles_answers):
                 answers.sort(key=lambda x: x["logit_score"], reverse=True)
-                top_k_answers = answers[:max_answers]
-                for answer in top_k_answers:
-                    text = answer["text"].lower()
-                    score = answer["logit_score"]
+                top_k_answers.append((article_id, [(answer["text"].lower(), answer["logit_score"]) for answer in answers[:max_answers] if answer["logit_score"] >= 1.0]))
 
-                    if score < 1.0:
-                        continue
+        return top_k_answers
 
-                    if text in predicted_answers:
-                        if score > predicted_answers[text]['score']:
-                            predicted_answers[text]['score'] = score
-                        predicted_answers[text]['article_ids'].add(example_id)
-                    else:
-                        predicted_answers[text] = {'score': score, 'article_ids': set([example_id])}
+    def _tokenize_contexts(self, articles: List[Tuple[str, str]]) -> Tuple[_QAFeaturesBuilder, List[Tuple[np.ndarray, np.ndarray]]]:
+        # Load the trained tokenizer, the model is loaded by the inference runner where it runs
+        tokenizer = self._models_registry.get_tokenizer(self._trained_save_path)
 
-        
-        if predicted_answers:
-            # Find the maximum score among all answers
-            max_value = max(val['score'] for val in predicted_answers.values())
-
-            # Calculate the threshold as a percentage of the max_value
-            threshold = max_value * 0.6
-
-            # Create a new dictionary that includes entries with values greater than or equal to the threshold
-            filtered_predicted_answers = {key: val for key, val in predicted_answers.items() if val['score'] >= threshold}
-
-            # Sort the dictionary items by score, so that higher score items appear first
-            sorted_filtered_predicted_answers = {k: v for k, v in sorted(filtered_predicted_answers.items(), key=lambda item: item[1]['score'], reverse=True)}
-
-            # Create a new dictionary to store the final answers
-            final_filtered_answers = {}
-
-            for key, value in sorted_filtered_predicted_answers.items():
-                should_add = True
-                for existing_key, existing_value in final_filtered_answers.items():
-                    # Check if the existing answer string contains the new answer string and has higher score
-                    if existing_key.find(key) != -1 and existing_value['score'] > value['score']:
-                        should_add = False
-                        break
-                    # Check if the new answer string contains the existing answer string and has higher score
-                    elif key.find(existing_key) != -1 and value['score'] > existing_value['score']:
-                        del final_filtered_answers[existing_key]
-                        break
-                if should_add:
-                    final_filtered_answers[key] = value
-
-            return final_filtered_answers
-        else:
-            return predicted_answers
-
-    @retry(
-    stop=stop_after_attempt(3), 
-    wait=wait_fixed(2)
-    )
-    async def _get_article_async(self, id: str):
-        return await self._graph_client.article(id)
\ No newline at end of file
+        max_length = 384
+        stride = 128
+
+        # The contexts are tokenized once per article and tokenizer through the tokenization cache, only the windows depend on the question
+        contexts_encodings = self._articles_tokenizer.tokenize(tokenizer, articles, add_special_tokens=False)
+        return _QAFeaturesBuilder(tokenizer, max_length, stride), contexts_encodings
+
+    def _load_max_answer_length(self) -> int:
+        max_answer_length = 0
+        with open(self._max_answer_length_full_file_name, 'r') as f:
+            data = json.load(f)
+            max_answer_length = data['max_answer_length']
+
+        self._logger.info(f"max_answer_length: {max_answer_length}")
+        return max_answer_length
+
+    def _score_spans(self, span_scorer: _SpanScorer, articles: List[Tuple[str, str]], features_batch: _QAFeaturesBatch, outputs: Dict[str, np.ndarray], articles_answers: List[List[Dict]]):
+        # The windows of an article are consecutive, so its answers are collected in the windows order
+        for feature_index, example_index in enumerate(features_batch.example_indexes.tolist()):
+            articles_answers[example_index].extend(span_scorer.score(outputs["start_logits"][feature_index], outputs["end_logits"][feature_index],
+                                                                     features_batch.offsets[feature_index], articles[example_index][1]))
+
+    def aggregate_answers(self, articles_answers: List[Tuple[str, List[Tuple[str, float]]]]):
+        """
+        Merges the articles answers into the risk factors of the disease, keeping the answers close to the best score
+        and dropping an answer contained in a better scored one
+        """
+        return _AnswersAggregator(threshold_ratio=0.6).aggregate(articles_answers)
\ No newline at end of file
@@ -1,7 +1,17 @@
 from thesis_diseases_risk_factors.domain.shared_kernel.shared_kernel_container import SharedKernelContainer
 from thesis_diseases_risk_factors.domain.shared_kernel.utils import Utils
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.domain.shared_kernel.models_registry import ModelsRegistry
+from thesis_diseases_risk_factors.domain.shared_kernel.training_data_snapshot import TrainingDataSnapshot
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_tokenizer import ArticlesTokenizer
+from thesis_diseases_risk_factors.domain.shared_kernel.inference_runner import InferenceRunner
 
 
 __all__ = ['SharedKernelContainer',
             'Utils',
+            'ArticlesFetcher',
+            'ModelsRegistry',
+            'TrainingDataSnapshot',
+            'ArticlesTokenizer',
+            'InferenceRunner',
             ]
\ No newline at end of file
@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+from tenacity import retry, stop_after_attempt, wait_fixed
+
+from thesis_diseases_risk_factors.graph.client import Client
+from thesis_diseases_risk_factors.infrastructure.caching.articles_cache import ArticlesCache
+
+
+class ArticlesFetcher:
+    def __init__(self,
+        graph_client: Client,
+        articles_cache: ArticlesCache,
+        max_concurrency: int,
+        batch_size: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._graph_client = graph_client
+        self._articles_cache = articles_cache
+        self._max_concurrency = max_concurrency
+        self._batch_size = batch_size
+
+    async def fetch_async(self, articles_ids: List[str]) -> List[Tuple[str, str]]:
+        """
+        Read the articles texts through the articles cache and fetch the missing ones in batches of batch_size ids with at most max_concurrency requests in flight.
+        A failed batch is fetched again one id at a time.
+        Returns (id, text) pairs in the order of articles_ids, articles that failed to download are skipped
+        """
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def fetch_batch_async(batch_ids: List[str]) -> Dict[str, str]:
+            async with semaphore:
+                try:
+                    resp = await self._get_articles_async(batch_ids)
+                    return {article.id: article.text for article in resp.articles}
+                except Exception as e:
+                    if len(batch_ids) == 1:
+                        self._logger.warning(f"Failed fetching article {batch_ids[0]}: {e}")
+                        return {}
+
+                    self._logger.warning(f"Failed fetching {len(batch_ids)} articles, fetching them one by one: {e}")
+
+            # A single bad article doesn't drop the rest of its batch
+            batch_texts = {}
+            for article_texts in await asyncio.gather(*(fetch_batch_async([id]) for id in batch_ids)):
+                batch_texts.update(article_texts)
+            return batch_texts
+
+        texts = self._articles_cache.get_many(articles_ids)
+        missing_ids = list(dict.fromkeys(id for id in articles_ids if id not in texts))
+
+        batches = [missing_ids[i:i + self._batch_size] for i in range(0, len(missing_ids), self._batch_size)]
+        for batch_texts in await asyncio.gather(*(fetch_batch_async(batch_ids) for batch_ids in batches)):
+            self._articles_cache.put_many(list(batch_texts.items()))
+            texts.update(batch_texts)
+
+        return [(id, texts[id]) for id in articles_ids if id in texts]
+
+    @retry(
+    stop=stop_after_attempt(3),
+    wait=wait_fixed(2)
+    )
+    async def _get_articles_async(self, ids: List[str]):
+        return await self._graph_client.articles(ids)
@@ -0,0 +1,61 @@
+import hashlib
+import json
+from typing import List, Optional, Tuple
+import numpy as np
+from transformers import PreTrainedTokenizerBase, PreTrainedTokenizerFast
+
+from thesis_diseases_risk_factors.infrastructure.caching.tokenization_cache import TokenizationCache
+
+
+class ArticlesTokenizer:
+    """
+    Tokenizes articles texts through the tokenization cache.
+    An entry is keyed by the article id, the text hash, the tokenizer fingerprint and the tokenization parameters,
+    so a retrained tokenizer or an edited article never reads a stale entry
+    """
+    def __init__(self,
+        tokenization_cache: TokenizationCache) -> None:
+        self._tokenization_cache = tokenization_cache
+
+    def tokenize(self,
+        tokenizer: PreTrainedTokenizerBase,
+        articles: List[Tuple[str, str]],
+        add_special_tokens: bool,
+        max_length: Optional[int] = None) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the (token ids, offsets) arrays of each article, in the order of articles.
+        The texts are truncated to max_length tokens when it's set
+        """
+        fingerprint = self._fingerprint(tokenizer)
+        parameters = f"add_special_tokens={add_special_tokens}:max_length={max_length}"
+        keys = [self._key(article_id, text, fingerprint, parameters) for article_id, text in articles]
+
+        encodings = self._tokenization_cache.get_many(keys)
+        missing = [(key, text) for key, (_, text) in zip(keys, articles) if key not in encodings]
+        if missing:
+            inputs = tokenizer([text for _, text in missing],
+                               add_special_tokens=add_special_tokens,
+                               truncation=max_length is not None,
+                               max_length=max_length,
+                               return_offsets_mapping=True,
+                               return_attention_mask=False,
+                               return_token_type_ids=False)
+
+            new_encodings = [(key, np.array(input_ids, dtype=np.int32), np.array(offsets, dtype=np.int32).reshape(-1, 2))
+                             for (key, _), input_ids, offsets in zip(missing, inputs["input_ids"], inputs["offset_mapping"])]
+            self._tokenization_cache.put_many(new_encodings)
+            encodings.update((key, (input_ids, offsets)) for key, input_ids, offsets in new_encodings)
+
+        return [encodings[key] for key in keys]
+
+    def _fingerprint(self, tokenizer: PreTrainedTokenizerBase) -> str:
+        if isinstance(tokenizer, PreTrainedTokenizerFast):
+            definition = tokenizer.backend_tokenizer.to_str()
+        else:
+            definition = json.dumps([type(tokenizer).__name__, tokenizer.get_vocab(), tokenizer.init_kwargs], sort_keys=True, default=str)
+
+        return hashlib.sha256(definition.encode("utf-8")).hexdigest()
+
+    def _key(self, article_id: str, text: str, fingerprint: str, parameters: str) -> str:
+        text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{article_id}:{text_hash}:{fingerprint}:{parameters}".encode("utf-8")).hexdigest()
@@ -0,0 +1,68 @@
+from typing import Dict, List
+import numpy as np
+import torch
+
+from thesis_diseases_risk_factors.domain.shared_kernel.models_registry import ModelsRegistry
+from thesis_diseases_risk_factors.infrastructure.inference.inference_pool import InferencePool
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor import BlockingExecutor
+
+
+class InferenceRunner:
+    """
+    Runs the forward pass of a trained model on batches of numpy inputs and returns the named outputs as numpy arrays.
+    The runtime is fp32 or int8 torch, or the exported ONNX graph in ONNX Runtime, the int8 and the ONNX runtimes are CPU only.
+    The torch batches on the CPU are sent to the inference pool when it's enabled, so concurrent batches run in parallel in the workers.
+    Otherwise the model or the ONNX session of the models registry runs in the blocking executor
+    """
+    RUNTIMES = ["fp32", "int8", "onnx"]
+
+    def __init__(self,
+        models_registry: ModelsRegistry,
+        inference_pool: InferencePool,
+        blocking_executor: BlockingExecutor,
+        trained_save_path: str,
+        model_class,
+        device: torch.device,
+        output_names: List[str],
+        runtime: str = "fp32") -> None:
+        if runtime not in self.RUNTIMES:
+            raise ValueError(f"Unknown inference runtime {runtime}, expected one of {self.RUNTIMES}")
+
+        self._models_registry = models_registry
+        self._inference_pool = inference_pool
+        self._blocking_executor = blocking_executor
+        self._trained_save_path = trained_save_path
+        self._model_class = model_class
+        self._device = device
+        self._output_names = output_names
+        self._runtime = runtime
+
+    @property
+    def out_of_process(self) -> bool:
+        return self._inference_pool.enabled and self._device.type == "cpu" and self._runtime != "onnx"
+
+    @property
+    def _quantized(self) -> bool:
+        return self._runtime == "int8"
+
+    async def run_async(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        if self._runtime == "onnx":
+            # ONNX Runtime releases the GIL and parallelizes each run with its own intra op threads
+            return await self._blocking_executor.run_async(self._run_onnx, inputs)
+
+        if self.out_of_process:
+            checkpoint_hash = await self._blocking_executor.run_async(self._models_registry.checkpoint_hash, self._trained_save_path)
+            return await self._inference_pool.run_async(self._trained_save_path, self._model_class.__name__, self._quantized, checkpoint_hash, inputs, self._output_names)
+
+        return await self._blocking_executor.run_async(self._run, inputs)
+
+    def _run(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        model, _ = self._models_registry.get(self._trained_save_path, self._model_class, self._device, self._quantized)
+        with torch.inference_mode():
+            outputs = model(**{name: torch.from_numpy(array).to(self._device) for name, array in inputs.items()})
+
+        return {name: getattr(outputs, name).float().cpu().numpy() for name in self._output_names}
+
+    def _run_onnx(self, inputs: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        session = self._models_registry.get_onnx_session(self._trained_save_path)
+        return session.run(inputs, self._output_names)
@@ -0,0 +1,88 @@
+import hashlib
+import logging
+import os
+import threading
+from typing import Dict, Tuple
+import torch
+from transformers import AutoTokenizer, PreTrainedModel, PreTrainedTokenizerBase
+
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_runtime_session import OnnxRuntimeSession
+from thesis_diseases_risk_factors.infrastructure.inference.quantization import load_model
+
+
+class ModelsRegistry:
+    """
+    Process wide registry of the trained models, each model and tokenizer is loaded once and kept on its device in eval mode
+    """
+    def __init__(self) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._models: Dict[Tuple[str, str, str, bool], Tuple[PreTrainedModel, PreTrainedTokenizerBase]] = {}
+        self._tokenizers: Dict[str, PreTrainedTokenizerBase] = {}
+        self._onnx_sessions: Dict[str, OnnxRuntimeSession] = {}
+        self._checkpoints_hashes: Dict[str, str] = {}
+
+    def get(self, trained_save_path: str, model_class, device: torch.device, quantized: bool = False) -> Tuple[PreTrainedModel, PreTrainedTokenizerBase]:
+        """
+        Returns the model and its tokenizer, the int8 quantized model runs on the CPU only
+        """
+        key = (trained_save_path, model_class.__name__, str(device), quantized)
+        with self._lock:
+            if key not in self._models:
+                self._logger.info(f"Loading {model_class.__name__} from {trained_save_path} to {device}, quantized: {quantized}")
+                model = load_model(trained_save_path, model_class, quantized)
+                model.to(device)
+                self._models[key] = (model, self._get_tokenizer(trained_save_path))
+
+            return self._models[key]
+
+    def get_tokenizer(self, trained_save_path: str) -> PreTrainedTokenizerBase:
+        """
+        Returns the tokenizer alone, for the callers that run the model out of process
+        """
+        with self._lock:
+            return self._get_tokenizer(trained_save_path)
+
+    def get_onnx_session(self, trained_save_path: str) -> OnnxRuntimeSession:
+        """
+        Returns the ONNX Runtime session of the graph exported with the trained model
+        """
+        with self._lock:
+            if trained_save_path not in self._onnx_sessions:
+                self._onnx_sessions[trained_save_path] = OnnxRuntimeSession(trained_save_path)
+
+            return self._onnx_sessions[trained_save_path]
+
+    def checkpoint_hash(self, trained_save_path: str) -> str:
+        """
+        Returns the hash of all the files of the saved model, computed once until the path is invalidated
+        """
+        with self._lock:
+            if trained_save_path not in self._checkpoints_hashes:
+                sha = hashlib.sha256()
+                for root, dirs, files in os.walk(trained_save_path):
+                    dirs.sort()
+                    for file_name in sorted(files):
+                        full_file_name = os.path.join(root, file_name)
+                        sha.update(os.path.relpath(full_file_name, trained_save_path).encode("utf-8"))
+                        with open(full_file_name, "rb") as f:
+                            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                                sha.update(chunk)
+
+                self._checkpoints_hashes[trained_save_path] = sha.hexdigest()
+
+            return self._checkpoints_hashes[trained_save_path]
+
+    def invalidate(self, trained_save_path: str) -> None:
+        with self._lock:
+            for key in [key for key in self._models if key[0] == trained_save_path]:
+                del self._models[key]
+            self._tokenizers.pop(trained_save_path, None)
+            self._onnx_sessions.pop(trained_save_path, None)
+            self._checkpoints_hashes.pop(trained_save_path, None)
+
+    def _get_tokenizer(self, trained_save_path: str) -> PreTrainedTokenizerBase:
+        if trained_save_path not in self._tokenizers:
+            self._tokenizers[trained_save_path] = AutoTokenizer.from_pretrained(trained_save_path)
+
+        return self._tokenizers[trained_save_path]
@@ -1,11 +1,44 @@
 from dependency_injector import containers, providers
 
 from thesis_diseases_risk_factors.domain.shared_kernel.utils import Utils 
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.domain.shared_kernel.models_registry import ModelsRegistry
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_tokenizer import ArticlesTokenizer
+from thesis_diseases_risk_factors.domain.shared_kernel.training_data_snapshot import TrainingDataSnapshot
 
 
 class SharedKernelContainer(containers.DeclarativeContainer):
     config = providers.Configuration()
+    graph_client = providers.Dependency()
+    articles_cache = providers.Dependency()
+    tokenization_cache = providers.Dependency()
 
     utils = providers.Factory(
         Utils
     )
+
+    articles_fetcher = providers.Factory(
+        ArticlesFetcher,
+        graph_client=graph_client,
+        articles_cache=articles_cache,
+        max_concurrency=config.articlesFetcher.maxConcurrency,
+        batch_size=config.articlesFetcher.batchSize
+    )
+
+    models_registry = providers.Singleton(
+        ModelsRegistry
+    )
+
+    articles_tokenizer = providers.Factory(
+        ArticlesTokenizer,
+        tokenization_cache=tokenization_cache
+    )
+
+    training_data_snapshot = providers.Factory(
+        TrainingDataSnapshot,
+        graph_client=graph_client,
+        articles_fetcher=articles_fetcher,
+        path=config.trainingDataSnapshot.path,
+        offline=config.trainingDataSnapshot.offline,
+        max_concurrency=config.trainingDataSnapshot.maxConcurrency
+    )
\ No newline at end of file
@@ -0,0 +1,213 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from thesis_diseases_risk_factors.domain.shared_kernel.articles_fetcher import ArticlesFetcher
+from thesis_diseases_risk_factors.graph.client import Client, ListClassificationItemsClassificationItems, ListQuestionsAnswersByDiseaseQas
+
+
+_ARTICLES_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("text", pa.string()),
+])
+
+_CLASSIFICATION_ITEMS_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("label", pa.int64()),
+    ("article_id", pa.string()),
+])
+
+# One row per answer, a question without answers has null answer columns and a QA without questions has null question columns
+_QAS_SCHEMA = pa.schema([
+    ("disease_id", pa.string()),
+    ("qa_id", pa.string()),
+    ("article_id", pa.string()),
+    ("question_id", pa.string()),
+    ("question_text", pa.string()),
+    ("answer_start", pa.int64()),
+    ("answer_text", pa.string()),
+])
+
+
+class TrainingDataSnapshot:
+    """
+    Local, versioned copy of the classification items and the QAs corpora used for training.
+    The corpora are kept as Parquet tables that reference the articles by id, each article text is stored once in the articles table
+    """
+    def __init__(self,
+        graph_client: Client,
+        articles_fetcher: ArticlesFetcher,
+        path: str,
+        offline: bool,
+        max_concurrency: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._graph_client = graph_client
+        self._articles_fetcher = articles_fetcher
+        self._path = path
+        self._offline = offline
+        self._max_concurrency = max_concurrency
+        self._manifest_full_file_name = os.path.join(self._path, "manifest.json")
+
+    @property
+    def exists(self) -> bool:
+        return os.path.exists(self._manifest_full_file_name)
+
+    @property
+    def version(self) -> int:
+        return self._read_manifest()["version"] if self.exists else 0
+
+    async def prepare_async(self) -> None:
+        """
+        Refreshes the snapshot, in offline mode the existing snapshot is used as is
+        """
+        if not self._offline:
+            await self.refresh_async()
+        elif not self.exists:
+            raise FileNotFoundError(f"Offline training requires a training data snapshot in {self._path}")
+        else:
+            self._logger.info(f"Offline training from training data snapshot version {self.version}")
+
+    async def refresh_async(self) -> None:
+        diseases_response = await self._graph_client.list_diseases()
+        disease_ids = [disease.id for disease in diseases_response.diseases]
+
+        classification_response = await self._graph_client.list_classification_items_refs()
+        classification_rows = [(item.id, item.label, item.article.id) for item in classification_response.classification_items]
+        qas_rows = await self._load_qas_rows_async(disease_ids)
+
+        # Only the articles that aren't in the snapshot yet are downloaded
+        articles = self._read_table("articles", _ARTICLES_SCHEMA)
+        articles = dict(zip(articles["id"], articles["text"]))
+        referenced_ids = list(dict.fromkeys([row[2] for row in classification_rows] + [row[2] for row in qas_rows]))
+        missing_ids = [id for id in referenced_ids if id not in articles]
+        articles.update(await self._articles_fetcher.fetch_async(missing_ids))
+
+        unavailable_ids = set(referenced_ids) - set(articles)
+        if unavailable_ids:
+            self._logger.warning(f"Skipping the training items of {len(unavailable_ids)} unavailable articles")
+            classification_rows = [row for row in classification_rows if row[2] not in unavailable_ids]
+            qas_rows = [row for row in qas_rows if row[2] not in unavailable_ids]
+
+        articles_rows = [(id, articles[id]) for id in referenced_ids if id not in unavailable_ids]
+
+        diff = {
+            "articles": self._diff("articles", _ARTICLES_SCHEMA, articles_rows, key_only=True),
+            "classificationItems": self._diff("classification_items", _CLASSIFICATION_ITEMS_SCHEMA, classification_rows),
+            "qas": self._diff("qas", _QAS_SCHEMA, qas_rows),
+        }
+        changed = any(table_diff["added"] or table_diff["removed"] for table_diff in diff.values())
+        if self.exists and not changed and self._read_manifest()["diseaseIds"] == disease_ids:
+            self._logger.info(f"Training data snapshot version {self.version} is up to date")
+            return
+
+        os.makedirs(self._path, exist_ok=True)
+        self._write_table("articles", _ARTICLES_SCHEMA, articles_rows)
+        self._write_table("classification_items", _CLASSIFICATION_ITEMS_SCHEMA, classification_rows)
+        self._write_table("qas", _QAS_SCHEMA, qas_rows)
+
+        manifest = {
+            "version": self.version + 1,
+            "updatedAt": datetime.now(timezone.utc).isoformat(),
+            "diseaseIds": disease_ids,
+            "counts": {"articles": len(articles_rows), "classificationItems": len(classification_rows), "qas": len(qas_rows)},
+            "diff": diff,
+        }
+        self._write_json(self._manifest_full_file_name, manifest)
+        self._logger.info(f"Training data snapshot updated to version {manifest['version']}: {json.dumps(diff)}")
+
+    def load_classification_items(self) -> List[ListClassificationItemsClassificationItems]:
+        texts = self._read_articles_texts()
+        items = self._read_table("classification_items", _CLASSIFICATION_ITEMS_SCHEMA)
+        return [ListClassificationItemsClassificationItems.parse_obj({"id": id, "label": label, "article": {"id": article_id, "text": texts[article_id]}})
+                for id, label, article_id in zip(items["id"], items["label"], items["article_id"])]
+
+    def load_diseases_qas(self) -> Tuple[List[str], Dict[str, List[ListQuestionsAnswersByDiseaseQas]]]:
+        """
+        Returns all the diseases ids and the QAs of each disease, in the structure returned by the GraphQL qas query
+        """
+        texts = self._read_articles_texts()
+        rows = self._read_table("qas", _QAS_SCHEMA)
+
+        qas = collections.OrderedDict()
+        for disease_id, qa_id, article_id, question_id, question_text, answer_start, answer_text in zip(*(rows[name] for name in _QAS_SCHEMA.names)):
+            qa = qas.setdefault((disease_id, qa_id), {"id": qa_id, "article": {"id": article_id, "text": texts[article_id]}, "questions": collections.OrderedDict()})
+            if question_id is None:
+                continue
+
+            question = qa["questions"].setdefault(question_id, {"id": question_id, "text": question_text, "answers": []})
+            if answer_start is not None:
+                question["answers"].append({"answer_start": answer_start, "text": answer_text})
+
+        diseases_qas = collections.defaultdict(list)
+        for (disease_id, _), qa in qas.items():
+            qa["questions"] = list(qa["questions"].values())
+            diseases_qas[disease_id].append(ListQuestionsAnswersByDiseaseQas.parse_obj(qa))
+
+        return list(self._read_manifest()["diseaseIds"]), diseases_qas
+
+    async def _load_qas_rows_async(self, disease_ids: List[str]) -> List[tuple]:
+        semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        async def load_disease_qas_async(disease_id: str):
+            async with semaphore:
+                return disease_id, await self._graph_client.list_questions_answers_refs_by_disease(disease_id=disease_id)
+
+        diseases_qas = dict(await asyncio.gather(*(load_disease_qas_async(disease_id) for disease_id in disease_ids)))
+
+        rows = []
+        for disease_id in disease_ids:
+            for qa in diseases_qas[disease_id].qas or []:
+                if not qa.questions:
+                    rows.append((disease_id, qa.id, qa.article.id, None, None, None, None))
+                for question in qa.questions:
+                    if not question.answers:
+                        rows.append((disease_id, qa.id, qa.article.id, question.id, question.text, None, None))
+                    for answer in question.answers:
+                        rows.append((disease_id, qa.id, qa.article.id, question.id, question.text, answer.answer_start, answer.text))
+
+        return rows
+
+    def _diff(self, name: str, schema: pa.Schema, rows: List[tuple], key_only: bool = False) -> Dict[str, int]:
+        existing = self._read_table(name, schema)
+        if key_only:
+            existing_rows = set(existing[schema.names[0]])
+            new_rows = set(row[0] for row in rows)
+        else:
+            existing_rows = set(zip(*(existing[column] for column in schema.names)))
+            new_rows = set(rows)
+
+        return {"added": len(new_rows - existing_rows), "removed": len(existing_rows - new_rows)}
+
+    def _read_articles_texts(self) -> Dict[str, str]:
+        articles = self._read_table("articles", _ARTICLES_SCHEMA)
+        return dict(zip(articles["id"], articles["text"]))
+
+    def _read_table(self, name: str, schema: pa.Schema) -> Dict[str, list]:
+        full_file_name = os.path.join(self._path, f"{name}.parquet")
+        if not os.path.exists(full_file_name):
+            return {column: [] for column in schema.names}
+
+        return pq.read_table(full_file_name, schema=schema).to_pydict()
+
+    def _write_table(self, name: str, schema: pa.Schema, rows: List[tuple]) -> None:
+        columns = list(zip(*rows)) if rows else [[] for _ in schema.names]
+        table = pa.Table.from_arrays([pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+
+        full_file_name = os.path.join(self._path, f"{name}.parquet")
+        pq.write_table(table, f"{full_file_name}.tmp", compression="zstd")
+        os.replace(f"{full_file_name}.tmp", full_file_name)
+
+    def _read_manifest(self) -> dict:
+        with open(self._manifest_full_file_name, 'r') as f:
+            return json.load(f)
+
+    def _write_json(self, full_file_name: str, data: dict) -> None:
+        with open(f"{full_file_name}.tmp", 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(f"{full_file_name}.tmp", full_file_name)
@@ -1,6 +1,7 @@
 # Generated by ariadne-codegen on 2023-08-19 23:26
 
 from .article import Article, ArticleArticle
+from .articles import Articles, ArticlesArticles
 from .async_base_client import AsyncBaseClient
 from .base_model import BaseModel
 from .client import Client
@@ -17,6 +18,11 @@ from .list_classification_items import (
     ListClassificationItemsClassificationItems,
     ListClassificationItemsClassificationItemsArticle,
 )
+from .list_classification_items_refs import (
+    ListClassificationItemsRefs,
+    ListClassificationItemsRefsClassificationItems,
+    ListClassificationItemsRefsClassificationItemsArticle,
+)
 from .list_diseases import (
     ListDiseases,
     ListDiseasesDiseases,
@@ -29,6 +35,13 @@ from .list_questions_answers_by_disease import (
     ListQuestionsAnswersByDiseaseQasQuestions,
     ListQuestionsAnswersByDiseaseQasQuestionsAnswers,
 )
+from .list_questions_answers_refs_by_disease import (
+    ListQuestionsAnswersRefsByDisease,
+    ListQuestionsAnswersRefsByDiseaseQas,
+    ListQuestionsAnswersRefsByDiseaseQasArticle,
+    ListQuestionsAnswersRefsByDiseaseQasQuestions,
+    ListQuestionsAnswersRefsByDiseaseQasQuestionsAnswers,
+)
 from .search_articles import SearchArticles
 from .statistics import Statistics, StatisticsStatistics
 from .update_risk_factors import UpdateRiskFactors, UpdateRiskFactorsUpdateRiskFactors
@@ -36,6 +49,8 @@ from .update_risk_factors import UpdateRiskFactors, UpdateRiskFactorsUpdateRiskF
 __all__ = [
     "Article",
     "ArticleArticle",
+    "Articles",
+    "ArticlesArticles",
     "AsyncBaseClient",
     "BaseModel",
     "Client",
@@ -47,6 +62,9 @@ __all__ = [
     "ListClassificationItems",
     "ListClassificationItemsClassificationItems",
     "ListClassificationItemsClassificationItemsArticle",
+    "ListClassificationItemsRefs",
+    "ListClassificationItemsRefsClassificationItems",
+    "ListClassificationItemsRefsClassificationItemsArticle",
     "ListDiseases",
     "ListDiseasesDiseases",
     "ListDiseasesDiseasesDbLinks",
@@ -55,6 +73,11 @@ __all__ = [
     "ListQuestionsAnswersByDiseaseQasArticle",
     "ListQuestionsAnswersByDiseaseQasQuestions",
     "ListQuestionsAnswersByDiseaseQasQuestionsAnswers",
+    "ListQuestionsAnswersRefsByDisease",
+    "ListQuestionsAnswersRefsByDiseaseQas",
+    "ListQuestionsAnswersRefsByDiseaseQasArticle",
+    "ListQuestionsAnswersRefsByDiseaseQasQuestions",
+    "ListQuestionsAnswersRefsByDiseaseQasQuestionsAnswers",
     "RiskFactorInput",
     "SearchArticles",
     "Statistics",
@@ -0,0 +1,19 @@
+# Generated by ariadne-codegen on 2023-08-19 23:26
+# Source: thesis_diseases_risk_factors/graph/queries.graphqls
+
+from typing import List
+
+from .base_model import BaseModel
+
+
+class Articles(BaseModel):
+    articles: List["ArticlesArticles"]
+
+
+class ArticlesArticles(BaseModel):
+    id: str
+    text: str
+
+
+Articles.update_forward_refs()
+ArticlesArticles.update_forward_refs()
@@ -4,11 +4,14 @@
 from typing import List
 
 from .article import Article
+from .articles import Articles
 from .async_base_client import AsyncBaseClient
 from .input_types import RiskFactorInput
 from .list_classification_items import ListClassificationItems
+from .list_classification_items_refs import ListClassificationItemsRefs
 from .list_diseases import ListDiseases
 from .list_questions_answers_by_disease import ListQuestionsAnswersByDisease
+from .list_questions_answers_refs_by_disease import ListQuestionsAnswersRefsByDisease
 from .search_articles import SearchArticles
 from .statistics import Statistics
 from .update_risk_factors import UpdateRiskFactors
@@ -62,6 +65,25 @@ class Client(AsyncBaseClient):
         data = self.get_data(response)
         return ListClassificationItems.parse_obj(data)
 
+    async def list_classification_items_refs(self) -> ListClassificationItemsRefs:
+        query = gql(
+            """
+            query ListClassificationItemsRefs {
+              classificationItems {
+                id
+                label
+                article {
+                  id
+                }
+              }
+            }
+            """
+        )
+        variables: dict[str, object] = {}
+        response = await self.execute(query=query, variables=variables)
+        data = self.get_data(response)
+        return ListClassificationItemsRefs.parse_obj(data)
+
     async def list_questions_answers_by_disease(
         self, disease_id: str
     ) -> ListQuestionsAnswersByDisease:
@@ -91,6 +113,34 @@ class Client(AsyncBaseClient):
         data = self.get_data(response)
         return ListQuestionsAnswersByDisease.parse_obj(data)
 
+    async def list_questions_answers_refs_by_disease(
+        self, disease_id: str
+    ) -> ListQuestionsAnswersRefsByDisease:
+        query = gql(
+            """
+            query ListQuestionsAnswersRefsByDisease($diseaseId: ID!) {
+              qas(diseaseId: $diseaseId) {
+                id
+                article {
+                  id
+                }
+                questions {
+                  id
+                  text
+                  answers {
+                    answer_start
+                    text
+                  }
+                }
+              }
+            }
+            """
+        )
+        variables: dict[str, object] = {"diseaseId": disease_id}
+        response = await self.execute(query=query, variables=variables)
+        data = self.get_data(response)
+        return ListQuestionsAnswersRefsByDisease.parse_obj(data)
+
     async def search_articles(self, term: str, limit: int) -> SearchArticles:
         query = gql(
             """
@@ -139,6 +189,22 @@ class Client(AsyncBaseClient):
         data = self.get_data(response)
         return Article.parse_obj(data)
 
+    async def articles(self, ids: List[str]) -> Articles:
+        query = gql(
+            """
+            query Articles($ids: [ID!]!) {
+              articles(ids: $ids) {
+                id
+                text
+              }
+            }
+            """
+        )
+        variables: dict[str, object] = {"ids": ids}
+        response = await self.execute(query=query, variables=variables)
+        data = self.get_data(response)
+        return Articles.parse_obj(data)
+
     async def statistics(self) -> Statistics:
         query = gql(
             """
@@ -0,0 +1,29 @@
+# Generated by ariadne-codegen on 2023-08-19 23:26
+# Source: thesis_diseases_risk_factors/graph/queries.graphqls
+
+from typing import List
+
+from pydantic import Field
+
+from .base_model import BaseModel
+
+
+class ListClassificationItemsRefs(BaseModel):
+    classification_items: List[
+        "ListClassificationItemsRefsClassificationItems"
+    ] = Field(alias="classificationItems")
+
+
+class ListClassificationItemsRefsClassificationItems(BaseModel):
+    id: str
+    label: int
+    article: "ListClassificationItemsRefsClassificationItemsArticle"
+
+
+class ListClassificationItemsRefsClassificationItemsArticle(BaseModel):
+    id: str
+
+
+ListClassificationItemsRefs.update_forward_refs()
+ListClassificationItemsRefsClassificationItems.update_forward_refs()
+ListClassificationItemsRefsClassificationItemsArticle.update_forward_refs()
@@ -0,0 +1,38 @@
+# Generated by ariadne-codegen on 2023-08-19 23:26
+# Source: thesis_diseases_risk_factors/graph/queries.graphqls
+
+from typing import List, Optional
+
+from .base_model import BaseModel
+
+
+class ListQuestionsAnswersRefsByDisease(BaseModel):
+    qas: Optional[List["ListQuestionsAnswersRefsByDiseaseQas"]]
+
+
+class ListQuestionsAnswersRefsByDiseaseQas(BaseModel):
+    id: str
+    article: "ListQuestionsAnswersRefsByDiseaseQasArticle"
+    questions: List["ListQuestionsAnswersRefsByDiseaseQasQuestions"]
+
+
+class ListQuestionsAnswersRefsByDiseaseQasArticle(BaseModel):
+    id: str
+
+
+class ListQuestionsAnswersRefsByDiseaseQasQuestions(BaseModel):
+    id: str
+    text: str
+    answers: List["ListQuestionsAnswersRefsByDiseaseQasQuestionsAnswers"]
+
+
+class ListQuestionsAnswersRefsByDiseaseQasQuestionsAnswers(BaseModel):
+    answer_start: int
+    text: str
+
+
+ListQuestionsAnswersRefsByDisease.update_forward_refs()
+ListQuestionsAnswersRefsByDiseaseQas.update_forward_refs()
+ListQuestionsAnswersRefsByDiseaseQasArticle.update_forward_refs()
+ListQuestionsAnswersRefsByDiseaseQasQuestions.update_forward_refs()
+ListQuestionsAnswersRefsByDiseaseQasQuestionsAnswers.update_forward_refs()
@@ -0,0 +1,11 @@
+from thesis_diseases_risk_factors.infrastructure.caching.articles_cache import ArticlesCache
+from thesis_diseases_risk_factors.infrastructure.caching.tokenization_cache import TokenizationCache
+from thesis_diseases_risk_factors.infrastructure.caching.predictions_cache import PredictionsCache
+from thesis_diseases_risk_factors.infrastructure.caching.evaluation_state_store import EvaluationStateStore
+
+
+__all__ = ['ArticlesCache',
+            'TokenizationCache',
+            'PredictionsCache',
+            'EvaluationStateStore',
+            ]
\ No newline at end of file
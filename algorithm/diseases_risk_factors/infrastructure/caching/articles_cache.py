@@ -0,0 +1,108 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+
+
+class ArticlesCache:
+    """
+    Persistent articles texts cache keyed by article id, stored in SQLite and bounded by the total texts size.
+    The least recently used articles are evicted first
+    """
+    _MAX_QUERY_PARAMETERS = 500
+
+    def __init__(self,
+        path: str,
+        max_size_bytes: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS articles (
+                id TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access INTEGER NOT NULL
+            )""")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS articles_last_access ON articles (last_access)")
+        self._connection.commit()
+
+        self._size, self._clock = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0), COALESCE(MAX(last_access), 0) FROM articles").fetchone()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        texts = {}
+        with self._lock:
+            for chunk in self._chunks(list(set(ids))):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(f"SELECT id, text FROM articles WHERE id IN ({placeholders})", chunk).fetchall()
+                texts.update(rows)
+
+            self._clock += 1
+            for chunk in self._chunks(list(texts.keys())):
+                placeholders = ",".join("?" * len(chunk))
+                self._connection.execute(f"UPDATE articles SET last_access = ? WHERE id IN ({placeholders})", [self._clock, *chunk])
+            self._connection.commit()
+
+            self._hits += sum(1 for id in ids if id in texts)
+            self._misses += sum(1 for id in ids if id not in texts)
+
+        return texts
+
+    def put_many(self, articles: List[Tuple[str, str]]) -> None:
+        if not articles:
+            return
+
+        articles = dict(articles)
+        with self._lock:
+            for chunk in self._chunks(list(articles.keys())):
+                placeholders = ",".join("?" * len(chunk))
+                replaced_size, = self._connection.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM articles WHERE id IN ({placeholders})", chunk).fetchone()
+                self._size -= replaced_size
+
+            self._clock += 1
+            rows = [(id, text, len(text.encode("utf-8")), self._clock) for id, text in articles.items()]
+            self._connection.executemany("INSERT OR REPLACE INTO articles (id, text, size, last_access) VALUES (?, ?, ?, ?)", rows)
+            self._size += sum(row[2] for row in rows)
+
+            self._evict()
+            self._connection.commit()
+
+    def close(self) -> None:
+        self._logger.info(f"articles cache hits: {self._hits}, misses: {self._misses}, size: {self._size} bytes")
+        self._connection.close()
+
+    def _evict(self) -> None:
+        while self._size > self._max_size_bytes:
+            rows = self._connection.execute("SELECT id, size FROM articles ORDER BY last_access LIMIT 100").fetchall()
+            if not rows:
+                break
+
+            for id, size in rows:
+                self._connection.execute("DELETE FROM articles WHERE id = ?", (id,))
+                self._size -= size
+                if self._size <= self._max_size_bytes:
+                    break
+
+    def _chunks(self, values: List[str]):
+        for i in range(0, len(values), self._MAX_QUERY_PARAMETERS):
+            yield values[i:i + self._MAX_QUERY_PARAMETERS]
@@ -0,0 +1,43 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from typing import Optional
+
+
+class EvaluationStateStore:
+    """
+    Persistent state of the last evaluation of each disease, stored in SQLite as a JSON document per disease
+    """
+    def __init__(self,
+        path: str) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS diseases (
+                id TEXT PRIMARY KEY,
+                state TEXT NOT NULL
+            )""")
+        self._connection.commit()
+
+    def get(self, disease_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection.execute("SELECT state FROM diseases WHERE id = ?", (disease_id,)).fetchone()
+
+        return json.loads(row[0]) if row else None
+
+    def put(self, disease_id: str, state: dict) -> None:
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO diseases (id, state) VALUES (?, ?)", (disease_id, json.dumps(state)))
+            self._connection.commit()
+
+    def close(self) -> None:
+        self._connection.close()
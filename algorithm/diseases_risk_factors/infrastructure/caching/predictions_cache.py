@@ -0,0 +1,81 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class PredictionsCache:
+    """
+    Persistent cache of the classification predictions, each entry holds the predicted label and the labels probabilities.
+    The keys identify the model checkpoint, so the cache is cleared when new models are trained instead of evicting entries
+    """
+    _MAX_QUERY_PARAMETERS = 500
+
+    def __init__(self,
+        path: str) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                key TEXT PRIMARY KEY,
+                label INTEGER NOT NULL,
+                probabilities BLOB NOT NULL
+            )""")
+        self._connection.commit()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[int, np.ndarray]]:
+        predictions = {}
+        with self._lock:
+            for chunk in self._chunks(list(set(keys))):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(f"SELECT key, label, probabilities FROM predictions WHERE key IN ({placeholders})", chunk).fetchall()
+                predictions.update((key, (label, np.frombuffer(probabilities, dtype=np.float32))) for key, label, probabilities in rows)
+
+            self._hits += sum(1 for key in keys if key in predictions)
+            self._misses += sum(1 for key in keys if key not in predictions)
+
+        return predictions
+
+    def put_many(self, predictions: List[Tuple[str, int, np.ndarray]]) -> None:
+        if not predictions:
+            return
+
+        rows = [(key, int(label), np.asarray(probabilities, dtype=np.float32).tobytes()) for key, label, probabilities in predictions]
+        with self._lock:
+            self._connection.executemany("INSERT OR REPLACE INTO predictions (key, label, probabilities) VALUES (?, ?, ?)", rows)
+            self._connection.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            count, = self._connection.execute("SELECT COUNT(*) FROM predictions").fetchone()
+            self._connection.execute("DELETE FROM predictions")
+            self._connection.commit()
+
+        self._logger.info(f"predictions cache cleared {count} predictions")
+
+    def close(self) -> None:
+        self._logger.info(f"predictions cache hits: {self._hits}, misses: {self._misses}")
+        self._connection.close()
+
+    def _chunks(self, values: List[str]):
+        for i in range(0, len(values), self._MAX_QUERY_PARAMETERS):
+            yield values[i:i + self._MAX_QUERY_PARAMETERS]
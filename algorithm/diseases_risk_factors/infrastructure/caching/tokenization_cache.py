@@ -0,0 +1,131 @@
+import logging
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+class TokenizationCache:
+    """
+    Persistent tokenization cache, the token ids and the offset mappings of all entries are appended to two memory mapped int32 arrays
+    and a SQLite index maps each key to its rows range. When the arrays grow beyond max_size_bytes the cache starts over empty
+    """
+    _MAX_QUERY_PARAMETERS = 500
+
+    def __init__(self,
+        path: str,
+        max_size_bytes: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        os.makedirs(path, exist_ok=True)
+        self._tokens_full_file_name = os.path.join(path, "tokens.bin")
+        self._offsets_full_file_name = os.path.join(path, "offsets.bin")
+
+        self._connection = sqlite3.connect(os.path.join(path, "index.sqlite"), check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                start INTEGER NOT NULL,
+                length INTEGER NOT NULL
+            )""")
+        self._connection.commit()
+
+        # Rows appended after the last committed entry belong to an interrupted write and are dropped
+        self._rows, = self._connection.execute("SELECT COALESCE(MAX(start + length), 0) FROM entries").fetchone()
+        for full_file_name, row_size in ((self._tokens_full_file_name, 4), (self._offsets_full_file_name, 8)):
+            with open(full_file_name, "ab") as f:
+                f.truncate(self._rows * row_size)
+
+        self._tokens = None
+        self._offsets = None
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Returns the (token ids, offsets) arrays of the cached keys, the arrays are copies that stay valid after the cache is cleared
+        """
+        entries = {}
+        with self._lock:
+            for chunk in self._chunks(list(set(keys))):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._connection.execute(f"SELECT key, start, length FROM entries WHERE key IN ({placeholders})", chunk).fetchall()
+                entries.update((key, (start, length)) for key, start, length in rows)
+
+            tokens, offsets = self._arrays()
+            values = {key: (np.array(tokens[start:start + length]), np.array(offsets[start:start + length]))
+                      for key, (start, length) in entries.items()}
+
+            self._hits += sum(1 for key in keys if key in values)
+            self._misses += sum(1 for key in keys if key not in values)
+
+        return values
+
+    def put_many(self, entries: List[Tuple[str, np.ndarray, np.ndarray]]) -> None:
+        if not entries:
+            return
+
+        entries = {key: (tokens, offsets) for key, tokens, offsets in entries}
+        with self._lock:
+            size = sum(len(tokens) for tokens, _ in entries.values()) * 12
+            if (self._rows * 12) + size > self._max_size_bytes:
+                self._clear()
+
+            rows = []
+            with open(self._tokens_full_file_name, "ab") as tokens_file, open(self._offsets_full_file_name, "ab") as offsets_file:
+                for key, (tokens, offsets) in entries.items():
+                    tokens_file.write(np.ascontiguousarray(tokens, dtype=np.int32).tobytes())
+                    offsets_file.write(np.ascontiguousarray(offsets, dtype=np.int32).reshape(-1, 2).tobytes())
+                    rows.append((key, self._rows, len(tokens)))
+                    self._rows += len(tokens)
+
+            self._connection.executemany("INSERT OR REPLACE INTO entries (key, start, length) VALUES (?, ?, ?)", rows)
+            self._connection.commit()
+            self._tokens = None
+            self._offsets = None
+
+    def close(self) -> None:
+        self._logger.info(f"tokenization cache hits: {self._hits}, misses: {self._misses}, size: {self._rows * 12} bytes")
+        self._tokens = None
+        self._offsets = None
+        self._connection.close()
+
+    def _arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        # The memory maps are reopened lazily after each append since a memmap can't grow
+        if self._tokens is None:
+            if self._rows == 0:
+                self._tokens = np.zeros(0, dtype=np.int32)
+                self._offsets = np.zeros((0, 2), dtype=np.int32)
+            else:
+                self._tokens = np.memmap(self._tokens_full_file_name, dtype=np.int32, mode="r", shape=(self._rows,))
+                self._offsets = np.memmap(self._offsets_full_file_name, dtype=np.int32, mode="r", shape=(self._rows, 2))
+
+        return self._tokens, self._offsets
+
+    def _clear(self) -> None:
+        self._logger.info(f"tokenization cache is full, clearing {self._rows * 12} bytes")
+        self._tokens = None
+        self._offsets = None
+        self._connection.execute("DELETE FROM entries")
+        self._connection.commit()
+        for full_file_name in (self._tokens_full_file_name, self._offsets_full_file_name):
+            with open(full_file_name, "wb"):
+                pass
+
+        self._rows = 0
+
+    def _chunks(self, values: List[str]):
+        for i in range(0, len(values), self._MAX_QUERY_PARAMETERS):
+            yield values[i:i + self._MAX_QUERY_PARAMETERS]
@@ -0,0 +1,7 @@
+from thesis_diseases_risk_factors.infrastructure.inference.inference_pool import InferencePool
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_runtime_session import OnnxRuntimeSession
+
+
+__all__ = ['InferencePool',
+            'OnnxRuntimeSession',
+            ]
\ No newline at end of file
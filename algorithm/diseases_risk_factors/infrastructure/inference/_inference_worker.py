@@ -0,0 +1,40 @@
+import logging
+from typing import Dict, List, Tuple
+import torch
+import transformers
+
+from thesis_diseases_risk_factors.infrastructure.inference._shared_arrays import SharedArraysSpec, attach_arrays, share_arrays
+from thesis_diseases_risk_factors.infrastructure.inference.quantization import load_model
+
+
+_models: Dict[str, Tuple[str, torch.nn.Module]] = {}
+"""
+The models loaded by this worker process, by trained save path, model class name and precision, with the checkpoint hash they were loaded from
+"""
+
+
+def init_worker(intra_op_threads: int) -> None:
+    torch.set_num_threads(intra_op_threads)
+
+
+def run_model(trained_save_path: str, model_class_name: str, quantized: bool, checkpoint_hash: str, inputs_spec: SharedArraysSpec, output_names: List[str]) -> SharedArraysSpec:
+    """
+    Runs the model on the inputs shared memory block and returns the spec of a new block with the outputs, the caller unlinks it
+    """
+    key = f"{trained_save_path}:{model_class_name}:{'int8' if quantized else 'fp32'}"
+    if key not in _models or _models[key][0] != checkpoint_hash:
+        logging.getLogger(__name__).info(f"Loading {model_class_name} from {trained_save_path}, quantized: {quantized}")
+        _models[key] = (checkpoint_hash, load_model(trained_save_path, getattr(transformers, model_class_name), quantized))
+
+    model = _models[key][1]
+    inputs_block, inputs = attach_arrays(inputs_spec)
+    try:
+        with torch.inference_mode():
+            outputs = model(**{name: torch.from_numpy(array) for name, array in inputs.items()})
+    finally:
+        del inputs
+        inputs_block.close()
+
+    outputs_block, outputs_spec = share_arrays({name: getattr(outputs, name).float().numpy() for name in output_names})
+    outputs_block.close()
+    return outputs_spec
@@ -0,0 +1,37 @@
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+SharedArraysSpec = Tuple[str, List[Tuple[str, str, Tuple[int, ...], int]]]
+"""
+The shared memory block name and the (name, dtype, shape, offset) of each array in it
+"""
+
+
+def share_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, SharedArraysSpec]:
+    """
+    Copies the arrays into a single new shared memory block, the caller owns the block and unlinks it
+    """
+    layout = []
+    size = 0
+    for name, array in arrays.items():
+        layout.append((name, array.dtype.str, array.shape, size))
+        # Keep every array 64 bytes aligned
+        size += (array.nbytes + 63) // 64 * 64
+
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for (name, dtype, shape, offset), array in zip(layout, arrays.values()):
+        np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset)[...] = array
+
+    return block, (block.name, layout)
+
+
+def attach_arrays(spec: SharedArraysSpec) -> Tuple[shared_memory.SharedMemory, Dict[str, np.ndarray]]:
+    """
+    Returns views of the arrays of an existing shared memory block, the views are valid until the block is closed
+    """
+    name, layout = spec
+    block = shared_memory.SharedMemory(name=name)
+    arrays = {array_name: np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=offset) for array_name, dtype, shape, offset in layout}
+    return block, arrays
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import numpy as np
+
+from thesis_diseases_risk_factors.infrastructure.inference._inference_worker import init_worker, run_model
+from thesis_diseases_risk_factors.infrastructure.inference._shared_arrays import attach_arrays, share_arrays
+
+
+class InferencePool:
+    """
+    Pool of worker processes that run the forward passes of the trained models, each worker loads a model once and keeps it.
+    The inputs and the outputs are handed over in shared memory blocks, only their layout is pickled.
+    With zero workers the pool is disabled
+    """
+    def __init__(self,
+        workers: int,
+        intra_op_threads: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._executor = None
+        if workers > 0:
+            # Workers are spawned, forking a process that already initialized torch isn't safe
+            self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                 mp_context=multiprocessing.get_context("spawn"),
+                                                 initializer=init_worker,
+                                                 initargs=(intra_op_threads,))
+            self._logger.info(f"inference pool started with {workers} workers of {intra_op_threads} intra op threads")
+
+    @property
+    def enabled(self) -> bool:
+        return self._executor is not None
+
+    async def run_async(self,
+        trained_save_path: str,
+        model_class_name: str,
+        quantized: bool,
+        checkpoint_hash: str,
+        inputs: Dict[str, np.ndarray],
+        output_names: List[str]) -> Dict[str, np.ndarray]:
+        inputs_block, inputs_spec = share_arrays(inputs)
+        try:
+            loop = asyncio.get_running_loop()
+            outputs_spec = await loop.run_in_executor(self._executor, run_model, trained_save_path, model_class_name, quantized, checkpoint_hash, inputs_spec, output_names)
+        finally:
+            inputs_block.close()
+            inputs_block.unlink()
+
+        outputs_block, outputs = attach_arrays(outputs_spec)
+        try:
+            return {name: np.array(array) for name, array in outputs.items()}
+        finally:
+            del outputs
+            outputs_block.close()
+            outputs_block.unlink()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
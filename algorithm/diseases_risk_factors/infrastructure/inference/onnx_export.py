@@ -0,0 +1,34 @@
+import copy
+import inspect
+import os
+from typing import List
+import torch
+from transformers import PreTrainedModel
+
+
+ONNX_MODEL_FILE_NAME = "model.onnx"
+"""
+The ONNX graph of the fp32 model, exported next to the trained model
+"""
+
+
+def export_onnx(model: PreTrainedModel, trained_save_path: str, input_names: List[str], output_names: List[str]) -> None:
+    """
+    Exports the model to an ONNX graph with dynamic batch and sequence axes, the model itself isn't changed
+    """
+    fp32_model = copy.deepcopy(model).cpu().float().eval()
+
+    # The traced inputs are positional, they are named in the order of the forward arguments
+    forward_parameters = list(inspect.signature(fp32_model.forward).parameters)
+    input_names = sorted(input_names, key=forward_parameters.index)
+    dummy_inputs = tuple(torch.ones((2, 8), dtype=torch.int64) for _ in input_names)
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + output_names}
+
+    torch.onnx.export(fp32_model,
+                      dummy_inputs,
+                      os.path.join(trained_save_path, ONNX_MODEL_FILE_NAME),
+                      input_names=input_names,
+                      output_names=output_names,
+                      dynamic_axes=dynamic_axes,
+                      opset_version=17,
+                      dynamo=False)
@@ -0,0 +1,36 @@
+import logging
+import os
+from typing import Dict, List
+import numpy as np
+import onnxruntime
+
+from thesis_diseases_risk_factors.infrastructure.inference.onnx_export import ONNX_MODEL_FILE_NAME
+
+
+class OnnxRuntimeSession:
+    """
+    ONNX Runtime CPU session of the exported graph of a trained model.
+    The inputs and the outputs are bound to CPU memory with IO binding, so the runtime doesn't copy the inputs or allocate the outputs per call
+    """
+    def __init__(self,
+        trained_save_path: str) -> None:
+        self._logger = logging.getLogger(__name__)
+        onnx_full_file_name = os.path.join(trained_save_path, ONNX_MODEL_FILE_NAME)
+        if not os.path.exists(onnx_full_file_name):
+            raise FileNotFoundError(f"No ONNX graph in {trained_save_path}, the models have to be trained again to export it")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = onnxruntime.InferenceSession(onnx_full_file_name, options, providers=["CPUExecutionProvider"])
+        self._input_names = [graph_input.name for graph_input in self._session.get_inputs()]
+        self._logger.info(f"ONNX Runtime session of {onnx_full_file_name} created with inputs {self._input_names}")
+
+    def run(self, inputs: Dict[str, np.ndarray], output_names: List[str]) -> Dict[str, np.ndarray]:
+        binding = self._session.io_binding()
+        for name in self._input_names:
+            binding.bind_cpu_input(name, np.ascontiguousarray(inputs[name], dtype=np.int64))
+        for name in output_names:
+            binding.bind_output(name, "cpu")
+
+        self._session.run_with_iobinding(binding)
+        return dict(zip(output_names, binding.copy_outputs_to_cpu()))
@@ -0,0 +1,51 @@
+import copy
+import json
+import logging
+import os
+import torch
+from transformers import PreTrainedModel
+
+
+QUANTIZED_STATE_FILE_NAME = "quantized_int8.pt"
+"""
+The state dict of the dynamically quantized model, saved next to the fp32 model
+"""
+
+QUANTIZATION_REPORT_FILE_NAME = "quantization_report.json"
+"""
+The accuracy and CPU latency of the quantized model compared to the fp32 model, measured at the end of the training
+"""
+
+
+def quantize_dynamic_int8(model: PreTrainedModel) -> torch.nn.Module:
+    """
+    Returns a CPU copy of the model with int8 dynamically quantized Linear layers, the model itself isn't changed
+    """
+    fp32_model = copy.deepcopy(model).cpu().eval()
+    return torch.quantization.quantize_dynamic(fp32_model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def save_quantized(quantized_model: torch.nn.Module, trained_save_path: str, report: dict) -> None:
+    torch.save(quantized_model.state_dict(), os.path.join(trained_save_path, QUANTIZED_STATE_FILE_NAME))
+    with open(os.path.join(trained_save_path, QUANTIZATION_REPORT_FILE_NAME), "w") as f:
+        json.dump(report, f, indent=2)
+
+
+def load_model(trained_save_path: str, model_class, quantized: bool) -> torch.nn.Module:
+    """
+    Loads the trained model in eval mode, the quantized model is loaded on the CPU from its saved state.
+    A model that was trained without a quantized state is quantized on load
+    """
+    model = model_class.from_pretrained(trained_save_path)
+    model.eval()
+    if not quantized:
+        return model
+
+    quantized_model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    quantized_state_full_file_name = os.path.join(trained_save_path, QUANTIZED_STATE_FILE_NAME)
+    if os.path.exists(quantized_state_full_file_name):
+        quantized_model.load_state_dict(torch.load(quantized_state_full_file_name))
+    else:
+        logging.getLogger(__name__).warning(f"No quantized state in {trained_save_path}, quantizing the fp32 model")
+
+    return quantized_model
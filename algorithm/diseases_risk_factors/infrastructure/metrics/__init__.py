@@ -0,0 +1,5 @@
+from thesis_diseases_risk_factors.infrastructure.metrics.metrics import Metrics
+
+
+__all__ = ['Metrics',
+            ]
\ No newline at end of file
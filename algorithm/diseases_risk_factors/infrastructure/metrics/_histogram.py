@@ -0,0 +1,43 @@
+import bisect
+import math
+from typing import List, Tuple
+
+
+class _Histogram:
+    """
+    Cumulative buckets histogram like the Prometheus histograms, with the count, the sum, the min and the max of the observed values
+    """
+    def __init__(self,
+        buckets: Tuple[float, ...]) -> None:
+        self._bounds = sorted(buckets)
+        self._bucket_counts = [0] * (len(self._bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def observe(self, value: float) -> None:
+        self._bucket_counts[bisect.bisect_left(self._bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def buckets(self) -> List[Tuple[float, int]]:
+        """
+        Returns the (upper bound, cumulative count) of each bucket, the last upper bound is +inf
+        """
+        cumulative_counts = []
+        count = 0
+        for bound, bucket_count in zip(self._bounds + [math.inf], self._bucket_counts):
+            count += bucket_count
+            cumulative_counts.append((bound, count))
+
+        return cumulative_counts
+
+    def summary(self) -> dict:
+        if self.count == 0:
+            return {"count": 0, "sum": 0.0}
+
+        return {"count": self.count, "sum": self.sum, "mean": self.sum / self.count, "min": self.min, "max": self.max,
+                "buckets": {("+Inf" if math.isinf(bound) else str(bound)): count for bound, count in self.buckets()}}
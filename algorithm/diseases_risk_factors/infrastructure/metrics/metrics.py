@@ -0,0 +1,148 @@
+import contextlib
+import contextvars
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from thesis_diseases_risk_factors.infrastructure.metrics._histogram import _Histogram
+
+
+class Metrics:
+    """
+    In process timers, counters and histograms of the evaluation hot paths.
+    Each value is recorded for the whole run and for the disease of the current context, set with disease_scope.
+    The disease is a context variable, so the stages of the pipeline that process different diseases concurrently record to their own disease.
+    The run summary is written as JSON and optionally as a Prometheus text file, for the node exporter textfile collector
+    """
+    SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+    _PROMETHEUS_PREFIX = "diseases_risk_factors"
+
+    def __init__(self,
+        summary_path: str,
+        prometheus_path: Optional[str]) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._summary_path = summary_path
+        self._prometheus_path = prometheus_path
+        self._lock = threading.Lock()
+        self._disease_id = contextvars.ContextVar("disease_id", default=None)
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started_at = datetime.now(timezone.utc)
+            self._start = time.perf_counter()
+            self._counters: Dict[str, float] = defaultdict(float)
+            self._histograms: Dict[str, _Histogram] = {}
+            self._diseases_counters: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+            self._diseases_timers: Dict[str, Dict[str, list]] = defaultdict(lambda: defaultdict(lambda: [0, 0.0]))
+
+    @contextlib.contextmanager
+    def disease_scope(self, disease_id: str):
+        token = self._disease_id.set(disease_id)
+        try:
+            yield
+        finally:
+            self._disease_id.reset(token)
+
+    @contextlib.contextmanager
+    def timer(self, name: str):
+        """
+        Records the wall time of the block in the name_seconds histogram, awaits inside the block are part of the time
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_seconds(name, time.perf_counter() - start)
+
+    def observe_seconds(self, name: str, seconds: float) -> None:
+        self.observe(f"{name}_seconds", seconds)
+        disease_id = self._disease_id.get()
+        if disease_id is not None:
+            with self._lock:
+                disease_timer = self._diseases_timers[disease_id][name]
+                disease_timer[0] += 1
+                disease_timer[1] += seconds
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = SECONDS_BUCKETS) -> None:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = _Histogram(buckets)
+            self._histograms[name].observe(value)
+
+    def increment(self, name: str, value: float = 1) -> None:
+        disease_id = self._disease_id.get()
+        with self._lock:
+            self._counters[name] += value
+            if disease_id is not None:
+                self._diseases_counters[disease_id][name] += value
+
+    def summary(self) -> dict:
+        with self._lock:
+            seconds = time.perf_counter() - self._start
+            diseases_ids = sorted(set(self._diseases_counters) | set(self._diseases_timers))
+            return {
+                "startedAt": self._started_at.isoformat(),
+                "seconds": seconds,
+                "run": {
+                    "counters": dict(self._counters),
+                    "throughput": {name: value / seconds for name, value in self._counters.items()} if seconds > 0 else {},
+                    "histograms": {name: histogram.summary() for name, histogram in self._histograms.items()},
+                },
+                "diseases": {
+                    disease_id: {
+                        "counters": dict(self._diseases_counters[disease_id]),
+                        "seconds": {name: total for name, (_, total) in self._diseases_timers[disease_id].items()},
+                    }
+                    for disease_id in diseases_ids
+                },
+            }
+
+    def write(self) -> dict:
+        """
+        Writes the run summary JSON and the Prometheus text file when it's configured, returns the summary
+        """
+        summary = self.summary()
+        self._write_atomically(self._summary_path, json.dumps(summary, indent=2))
+        if self._prometheus_path:
+            self._write_atomically(self._prometheus_path, self._prometheus_text(summary["seconds"]))
+
+        self._logger.info(f"metrics written to {self._summary_path}")
+        return summary
+
+    def _prometheus_text(self, seconds: float) -> str:
+        # Only the whole run is exported, a label per disease would create too many series
+        lines = [f"# TYPE {self._PROMETHEUS_PREFIX}_evaluation_run_seconds gauge",
+                 f"{self._PROMETHEUS_PREFIX}_evaluation_run_seconds {seconds}"]
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                metric_name = f"{self._PROMETHEUS_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric_name} counter")
+                lines.append(f"{metric_name} {value}")
+
+            for name, histogram in sorted(self._histograms.items()):
+                metric_name = f"{self._PROMETHEUS_PREFIX}_{name}"
+                lines.append(f"# TYPE {metric_name} histogram")
+                for bound, count in histogram.buckets():
+                    lines.append(f'{metric_name}_bucket{{le="{"+Inf" if math.isinf(bound) else bound}"}} {count}')
+                lines.append(f"{metric_name}_sum {histogram.sum}")
+                lines.append(f"{metric_name}_count {histogram.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def _write_atomically(self, path: str, text: str) -> None:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(text)
+        os.replace(temp_path, path)
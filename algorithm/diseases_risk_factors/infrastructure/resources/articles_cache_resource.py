@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.caching.articles_cache import ArticlesCache
+
+
+class ArticlesCacheResource(Resource):
+    @classmethod
+    def _create(cls, config) -> ArticlesCache:
+        return ArticlesCache(config["path"], config["maxSizeMB"] * 1024 * 1024)
+
+    @classmethod
+    def _shutdown(cls, resource: ArticlesCache) -> None:
+        resource.close()
\ No newline at end of file
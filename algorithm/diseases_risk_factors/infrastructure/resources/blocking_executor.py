@@ -0,0 +1,24 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BlockingExecutor:
+    """
+    Runs blocking, CPU heavy calls outside of the event loop, so the network stages keep running while the models compute.
+    The calls are bound methods of the models and the registry with unpicklable state, so they run in a thread pool.
+    The parallel CPU bound inference runs in the processes of the inference pool
+    """
+    def __init__(self,
+        max_workers: int) -> None:
+        self._logger = logging.getLogger(__name__)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._logger.info(f"blocking executor started with {max_workers} thread workers")
+
+    async def run_async(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def close(self) -> None:
+        self._executor.shutdown()
@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor import BlockingExecutor
+
+
+class BlockingExecutorResource(Resource):
+    @classmethod
+    def _create(cls, config) -> BlockingExecutor:
+        return BlockingExecutor(config["maxWorkers"])
+
+    @classmethod
+    def _shutdown(cls, resource: BlockingExecutor) -> None:
+        resource.close()
\ No newline at end of file
@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.caching.evaluation_state_store import EvaluationStateStore
+
+
+class EvaluationStateStoreResource(Resource):
+    @classmethod
+    def _create(cls, config) -> EvaluationStateStore:
+        return EvaluationStateStore(config["path"])
+
+    @classmethod
+    def _shutdown(cls, resource: EvaluationStateStore) -> None:
+        resource.close()
\ No newline at end of file
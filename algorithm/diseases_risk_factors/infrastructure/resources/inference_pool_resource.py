@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.inference.inference_pool import InferencePool
+
+
+class InferencePoolResource(Resource):
+    @classmethod
+    def _create(cls, config) -> InferencePool:
+        return InferencePool(config["workers"], config["intraOpThreads"])
+
+    @classmethod
+    def _shutdown(cls, resource: InferencePool) -> None:
+        resource.close()
\ No newline at end of file
@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.metrics.metrics import Metrics
+
+
+class MetricsResource(Resource):
+    @classmethod
+    def _create(cls, config) -> Metrics:
+        return Metrics(config["summaryPath"], config.get("prometheusPath"))
+
+    @classmethod
+    def _shutdown(cls, resource: Metrics) -> None:
+        pass
\ No newline at end of file
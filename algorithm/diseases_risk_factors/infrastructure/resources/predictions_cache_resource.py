@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.caching.predictions_cache import PredictionsCache
+
+
+class PredictionsCacheResource(Resource):
+    @classmethod
+    def _create(cls, config) -> PredictionsCache:
+        return PredictionsCache(config["path"])
+
+    @classmethod
+    def _shutdown(cls, resource: PredictionsCache) -> None:
+        resource.close()
\ No newline at end of file
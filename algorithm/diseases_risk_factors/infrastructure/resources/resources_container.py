@@ -3,6 +3,13 @@ from dependency_injector import containers, providers
 
 from thesis_diseases_risk_factors.infrastructure.resources.http_client_resource import HttpClientResource
 from thesis_diseases_risk_factors.infrastructure.resources.graph_client_resource import GraphClientResource
+from thesis_diseases_risk_factors.infrastructure.resources.articles_cache_resource import ArticlesCacheResource
+from thesis_diseases_risk_factors.infrastructure.resources.tokenization_cache_resource import TokenizationCacheResource
+from thesis_diseases_risk_factors.infrastructure.resources.predictions_cache_resource import PredictionsCacheResource
+from thesis_diseases_risk_factors.infrastructure.resources.evaluation_state_store_resource import EvaluationStateStoreResource
+from thesis_diseases_risk_factors.infrastructure.resources.inference_pool_resource import InferencePoolResource
+from thesis_diseases_risk_factors.infrastructure.resources.blocking_executor_resource import BlockingExecutorResource
+from thesis_diseases_risk_factors.infrastructure.resources.metrics_resource import MetricsResource
 
 
 class ResourcesContainer(containers.DeclarativeContainer):
@@ -21,4 +28,39 @@ class ResourcesContainer(containers.DeclarativeContainer):
     graph_client = providers.Resource(
         GraphClientResource.init,
         config=config.graph
+    )
+
+    articles_cache = providers.Resource(
+        ArticlesCacheResource.init,
+        config=config.articlesCache
+    )
+
+    tokenization_cache = providers.Resource(
+        TokenizationCacheResource.init,
+        config=config.tokenizationCache
+    )
+
+    predictions_cache = providers.Resource(
+        PredictionsCacheResource.init,
+        config=config.predictionsCache
+    )
+
+    evaluation_state_store = providers.Resource(
+        EvaluationStateStoreResource.init,
+        config=config.evaluationStateStore
+    )
+
+    inference_pool = providers.Resource(
+        InferencePoolResource.init,
+        config=config.inferencePool
+    )
+
+    blocking_executor = providers.Resource(
+        BlockingExecutorResource.init,
+        config=config.blockingExecutor
+    )
+
+    metrics = providers.Resource(
+        MetricsResource.init,
+        config=config.metrics
     )
\ No newline at end of file
@@ -0,0 +1,12 @@
+from thesis_diseases_risk_factors.infrastructure.resources.resource import Resource
+from thesis_diseases_risk_factors.infrastructure.caching.tokenization_cache import TokenizationCache
+
+
+class TokenizationCacheResource(Resource):
+    @classmethod
+    def _create(cls, config) -> TokenizationCache:
+        return TokenizationCache(config["path"], config["maxSizeMB"] * 1024 * 1024)
+
+    @classmethod
+    def _shutdown(cls, resource: TokenizationCache) -> None:
+        resource.close()
\ No newline at end of file
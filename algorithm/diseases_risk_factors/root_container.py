@@ -19,7 +19,10 @@ class RootContainer(containers.DeclarativeContainer):
 
     shared_kernel_package = providers.Container(
         SharedKernelContainer,
-        config=config.shared_kernel.domain
+        config=config.shared_kernel.domain,
+        graph_client=resources_package.graph_client,
+        articles_cache=resources_package.articles_cache,
+        tokenization_cache=resources_package.tokenization_cache
     )
 
     binary_classification_domain_package = providers.Container(
@@ -27,7 +30,15 @@ class RootContainer(containers.DeclarativeContainer):
         config=config.models,
         utils=shared_kernel_package.utils,
         graph_client=resources_package.graph_client,
-        http_client=resources_package.http_client
+        http_client=resources_package.http_client,
+        articles_fetcher=shared_kernel_package.articles_fetcher,
+        models_registry=shared_kernel_package.models_registry,
+        articles_tokenizer=shared_kernel_package.articles_tokenizer,
+        predictions_cache=resources_package.predictions_cache,
+        training_data_snapshot=shared_kernel_package.training_data_snapshot,
+        inference_pool=resources_package.inference_pool,
+        blocking_executor=resources_package.blocking_executor,
+        metrics=resources_package.metrics
     )
 
     question_answering_classification_domain_package = providers.Container(
@@ -35,7 +46,14 @@ class RootContainer(containers.DeclarativeContainer):
         config=config.models,
         utils=shared_kernel_package.utils,
         graph_client=resources_package.graph_client,
-        http_client=resources_package.http_client
+        http_client=resources_package.http_client,
+        articles_fetcher=shared_kernel_package.articles_fetcher,
+        models_registry=shared_kernel_package.models_registry,
+        articles_tokenizer=shared_kernel_package.articles_tokenizer,
+        training_data_snapshot=shared_kernel_package.training_data_snapshot,
+        inference_pool=resources_package.inference_pool,
+        blocking_executor=resources_package.blocking_executor,
+        metrics=resources_package.metrics
     )
 
     application_package = providers.Container(
@@ -44,6 +62,12 @@ class RootContainer(containers.DeclarativeContainer):
         utils=shared_kernel_package.utils,
         http_client=resources_package.http_client,
         graph_client=resources_package.graph_client,
+        articles_fetcher=shared_kernel_package.articles_fetcher,
+        training_data_snapshot=shared_kernel_package.training_data_snapshot,
+        predictions_cache=resources_package.predictions_cache,
+        evaluation_state_store=resources_package.evaluation_state_store,
+        blocking_executor=resources_package.blocking_executor,
+        metrics=resources_package.metrics,
         binary_classification_model = binary_classification_domain_package.binary_classification_model,
         question_answering_model = question_answering_classification_domain_package.question_answering_model
     )
@@ -0,0 +1,114 @@
+import random
+import string
+
+import numpy as np
+import pytest
+
+from thesis_diseases_risk_factors.domain.question_answering._answers_aggregator import _AnswersAggregator
+
+
+def _pairwise_aggregate(articles_answers, threshold_ratio=0.6):
+    """
+    The original aggregation, it checks every answer against every kept answer with str.find
+    """
+    predicted_answers = {}
+    for example_id, answers in articles_answers:
+        for text, score in answers:
+            if text in predicted_answers:
+                if score > predicted_answers[text]['score']:
+                    predicted_answers[text]['score'] = score
+                predicted_answers[text]['article_ids'].add(example_id)
+            else:
+                predicted_answers[text] = {'score': score, 'article_ids': set([example_id])}
+
+    if not predicted_answers:
+        return predicted_answers
+
+    max_value = max(val['score'] for val in predicted_answers.values())
+    threshold = max_value * threshold_ratio
+    filtered_predicted_answers = {key: val for key, val in predicted_answers.items() if val['score'] >= threshold}
+    sorted_filtered_predicted_answers = {k: v for k, v in sorted(filtered_predicted_answers.items(), key=lambda item: item[1]['score'], reverse=True)}
+    final_filtered_answers = {}
+
+    for key, value in sorted_filtered_predicted_answers.items():
+        should_add = True
+        for existing_key, existing_value in final_filtered_answers.items():
+            if existing_key.find(key) != -1 and existing_value['score'] > value['score']:
+                should_add = False
+                break
+            elif key.find(existing_key) != -1 and value['score'] > existing_value['score']:
+                del final_filtered_answers[existing_key]
+                break
+        if should_add:
+            final_filtered_answers[key] = value
+
+    return final_filtered_answers
+
+
+def _assert_same_as_pairwise(articles_answers):
+    answers = _AnswersAggregator(threshold_ratio=0.6).aggregate(articles_answers)
+    assert list(answers.items()) == list(_pairwise_aggregate(articles_answers).items())
+    return answers
+
+
+def test_no_answers():
+    assert _assert_same_as_pairwise([]) == {}
+    assert _assert_same_as_pairwise([("1", []), ("2", [])]) == {}
+
+
+def test_nested_answer_with_lower_score_is_dropped():
+    answers = _assert_same_as_pairwise([("1", [("high blood pressure", 10.0), ("blood pressure", 8.0), ("pressure", 7.0)])])
+    assert list(answers) == ["high blood pressure"]
+
+
+def test_nested_answer_with_higher_score_is_kept():
+    answers = _assert_same_as_pairwise([("1", [("blood pressure", 10.0), ("high blood pressure", 8.0)])])
+    assert list(answers) == ["blood pressure", "high blood pressure"]
+
+
+def test_tied_nested_answers_are_kept():
+    answers = _assert_same_as_pairwise([("1", [("smoking", 9.0), ("heavy smoking", 9.0), ("heavy smoking habit", 9.0), ("smoking habit", 6.0)])])
+    assert list(answers) == ["smoking", "heavy smoking", "heavy smoking habit"]
+
+
+def test_tied_answer_contained_in_a_higher_tier():
+    _assert_same_as_pairwise([("1", [("age", 10.0), ("obesity", 7.0), ("old age", 10.0), ("age group", 7.0), ("group", 7.0)])])
+
+
+def test_duplicate_answers_are_merged():
+    answers = _assert_same_as_pairwise([("1", [("obesity", 6.0), ("obesity", 9.0)]), ("2", [("obesity", 7.0)]), ("3", [("diet", 8.0)])])
+    assert answers["obesity"] == {"score": 9.0, "article_ids": {"1", "2"}}
+
+
+@pytest.mark.parametrize("articles_answers", [
+    [("1", [("", 10.0)])],
+    [("1", [("", 10.0), ("diabetes", 8.0)])],
+    [("1", [("diabetes", 10.0), ("", 8.0)])],
+    [("1", [("diabetes", 10.0), ("", 10.0)])],
+])
+def test_empty_answer(articles_answers):
+    _assert_same_as_pairwise(articles_answers)
+
+
+def test_answers_below_threshold_are_dropped():
+    answers = _assert_same_as_pairwise([("1", [("age", 10.0), ("sex", 6.0), ("diet", 5.9)])])
+    assert list(answers) == ["age", "sex"]
+
+
+@pytest.mark.parametrize("seed, alphabet, score_levels", [(0, "ab", 4), (1, "ab", 8), (2, "abc", 100), (3, string.ascii_lowercase, 1000)])
+def test_large_randomized_answers(seed, alphabet, score_levels):
+    # Answers are spans of a few long phrases, so they often contain each other, the scores are float32 logits with ties
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 6))) for _ in range(100)]
+    phrases = [[rng.choice(words) for _ in range(rng.randint(3, 12))] for _ in range(50)]
+    articles_answers = []
+    for article_id in range(500):
+        answers = []
+        for _ in range(10):
+            phrase = rng.choice(phrases)
+            start = rng.randint(0, len(phrase) - 1)
+            text = " ".join(phrase[start:rng.randint(start + 1, len(phrase))])
+            answers.append((text, np.float32(rng.randint(score_levels // 2, score_levels) / score_levels * 20 + 1)))
+        articles_answers.append((str(article_id), answers))
+
+    _assert_same_as_pairwise(articles_answers)
@@ -8,6 +8,7 @@ import (
 	"math"
 	"os"
 	"strconv"
+	"sync"
 	"time"
 
 	"github.com/bsm/redislock"
@@ -26,6 +27,9 @@ import (
 	"github.com/maximrub/thesis-diseases-risk-factors-server/internal/utils"
 )
 
+// maxConcurrentArticleFetches bounds the concurrent Entrez fetches of a single articles request
+const maxConcurrentArticleFetches = 4
+
 type DAL struct {
 	dbClient                      *mongo.Client
 	redisClient                   *redis.Client
@@ -319,6 +323,67 @@ func (d *DAL) GetArticle(id string) (*model.Article, error) {
 	return convertArticleToGql(article), nil
 }
 
+func (d *DAL) GetArticles(ctx context.Context, ids []string) ([]*model.Article, error) {
+	var articles []*Article
+	cursor, err := d.articlesCollection.Find(ctx, bson.M{"_id": bson.M{"$in": ids}})
+	if err != nil {
+		return nil, utils.WrapErrorf(err, "error finding articles in DB")
+	}
+
+	if err = cursor.All(ctx, &articles); err != nil {
+		return nil, utils.WrapErrorf(err, "error loading articles from DB")
+	}
+
+	articlesByID := make(map[string]*Article, len(articles))
+	for _, article := range articles {
+		articlesByID[article.ID] = article
+	}
+
+	// The articles missing from the DB are fetched from Entrez concurrently, so a batch isn't bounded by the sum of the fetches
+	var mu sync.Mutex
+	var wg sync.WaitGroup
+	semaphore := make(chan struct{}, maxConcurrentArticleFetches)
+	missingIDs := set.New[string](0)
+	fetchedByID := make(map[string]*Article)
+	for _, id := range ids {
+		if _, ok := articlesByID[id]; ok || missingIDs.Contains(id) {
+			continue
+		}
+
+		missingIDs.Insert(id)
+		wg.Add(1)
+		go func(id string) {
+			defer wg.Done()
+			semaphore <- struct{}{}
+			defer func() { <-semaphore }()
+
+			article, err := d.getArticle(id)
+			if err != nil {
+				log.WithError(err).WithField("articleID", id).Error("Error getting article")
+				return
+			}
+
+			mu.Lock()
+			fetchedByID[id] = article
+			mu.Unlock()
+		}(id)
+	}
+	wg.Wait()
+
+	for id, article := range fetchedByID {
+		articlesByID[id] = article
+	}
+
+	gqlArticles := make([]*model.Article, 0, len(ids))
+	for _, id := range ids {
+		if article, ok := articlesByID[id]; ok {
+			gqlArticles = append(gqlArticles, convertArticleToGql(article))
+		}
+	}
+
+	return gqlArticles, nil
+}
+
 func (d *DAL) getArticle(id string) (*Article, error) {
 	var article Article
 	err := d.articlesCollection.FindOne(context.TODO(), bson.M{"_id": id}).Decode(&article)
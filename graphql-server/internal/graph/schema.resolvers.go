@@ -56,6 +56,11 @@ func (r *queryResolver) Article(ctx context.Context, id string) (*model.Article,
 	return r.DAL.GetArticle(id)
 }
 
+// Articles is the resolver for the articles field.
+func (r *queryResolver) Articles(ctx context.Context, ids []string) ([]*model.Article, error) {
+	return r.DAL.GetArticles(ctx, ids)
+}
+
 // ClassificationItems is the resolver for the classificationItems field.
 func (r *queryResolver) ClassificationItems(ctx context.Context) ([]*model.ClassificationItem, error) {
 	return r.DAL.GetClassificationItems(ctx)